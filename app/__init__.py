@@ -19,9 +19,13 @@ Dependencies:
     - Flask-Migrate: For database migrations
 """
 
-from flask import Flask, request, render_template
+from flask import Flask, request, render_template, g
+import atexit
 import logging
 import os
+import random
+import time
+import uuid
 from datetime import datetime
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
@@ -29,6 +33,7 @@ from flask_bcrypt import Bcrypt
 from flask_migrate import Migrate
 from config import Config
 from app.utils.log_manager import log_manager
+from app.utils.request_stats import RequestStats
 
 # Initialize Flask extensions
 db = SQLAlchemy()
@@ -119,14 +124,38 @@ def create_app(config_class=Config):
             'now': datetime.now
         }
     
-    # Add request logging
+    # Add request logging, tagged with a per-request id. Only a sample of
+    # requests is logged in full; every request feeds the per-route stats.
+    request_stats = RequestStats(app.config.get('REQUEST_STATS_INTERVAL', 60))
+    app.extensions['request_stats'] = request_stats
+    atexit.register(request_stats.flush)
+    sample_rate = app.config.get('REQUEST_LOG_SAMPLE_RATE', 0.01)
+    slow_ms = app.config.get('REQUEST_LOG_SLOW_MS', 1000)
+    
     @app.before_request
     def log_request_info():
-        log_manager.logger.info(f"Incoming request: {request.method} {request.url}")
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+        g.request_started = time.perf_counter()
+        g.log_request = random.random() < sample_rate
+        if g.log_request:
+            log_manager.logger.info(f"Incoming request: {request.method} {request.url}")
     
     @app.after_request
     def log_response_info(response):
-        log_manager.logger.info(f"Response status: {response.status}")
+        latency_ms = (time.perf_counter() - g.request_started) * 1000 if 'request_started' in g else 0.0
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        request_stats.record(f"{request.method} {route}", response.status_code, latency_ms)
+        
+        # Errors and slow requests are always logged
+        if response.status_code >= 500 or latency_ms >= slow_ms:
+            log_manager.logger.warning(
+                f"Response status: {response.status} for {request.method} {request.path} in {latency_ms:.0f}ms"
+            )
+        elif g.get('log_request'):
+            log_manager.logger.info(f"Response status: {response.status} in {latency_ms:.0f}ms")
+        
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
         return response
     
     @app.route('/test')
@@ -51,6 +51,20 @@ class Conversation(db.Model):
         """Get the most recent messages in the conversation."""
         return self.messages.order_by(Message.created_at.desc()).limit(limit).all()
     
+    def iter_recent_messages(self, batch_size=20):
+        """Yield messages newest first, loading them from the database in batches."""
+        offset = 0
+        while True:
+            batch = (self.messages
+                     .order_by(Message.created_at.desc(), Message.id.desc())
+                     .offset(offset)
+                     .limit(batch_size)
+                     .all())
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            offset += batch_size
+    
     def set_context(self, key, value):
         """Update a specific context value."""
         if self.context is None:
@@ -93,9 +107,10 @@ class Message(db.Model):
     
     def set_data(self, key, value):
         """Update a specific metadata value."""
-        if self.message_data is None:
-            self.message_data = {}
-        self.message_data[key] = value
+        # Assign a new dict so SQLAlchemy detects the change to the JSON column
+        data = dict(self.message_data or {})
+        data[key] = value
+        self.message_data = data
     
     def get_data(self, key, default=None):
         """Get a specific metadata value."""
@@ -3,12 +3,14 @@ Admin Blueprint - Handles all administrative routes and functionalities
 This module contains all admin-related routes and access control decorators.
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context
 from functools import wraps
 from flask_login import current_user, login_required
 from app.models.user import User
 from app import db
 from datetime import datetime, timedelta
+from dataclasses import asdict
+import json
 from app.utils.log_manager import log_manager
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -31,14 +33,22 @@ def admin_dashboard():
     total_users = User.query.count()
     active_users = User.query.filter_by(is_active=True).count()
     
-    # Get today's events (placeholder for now)
-    events_today = 0
+    # Get today's events from the pre-aggregated hourly log counts
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    events_today = sum(log_manager.metrics.total('hour', since=midnight.timestamp()).values())
     
     # Get pending tasks (placeholder for now)
     pending_tasks = 0
     
-    # Get recent activities (placeholder for now)
-    recent_activities = []
+    # Get recent activity as per-hour log counts
+    recent_activities = [
+        {
+            'timestamp': datetime.fromtimestamp(bucket['start']).strftime('%Y-%m-%d %H:00'),
+            'description': f"{sum(bucket['levels'].values())} log events ("
+                           + ', '.join(f"{count} {level}" for level, count in sorted(bucket['levels'].items())) + ')'
+        }
+        for bucket in log_manager.metrics.recent('hour', limit=5)
+    ]
     
     return render_template('admin/dashboard.html',
                          total_users=total_users,
@@ -69,6 +79,8 @@ def view_logs():
     """System logs and activity monitoring"""
     level = request.args.get('level', None)
     date_str = request.args.get('date', None)
+    cursor = request.args.get('cursor', None)
+    query = request.args.get('q', '').strip() or None
     
     # Parse date filter if provided
     start_date = None
@@ -79,22 +91,26 @@ def view_logs():
         except ValueError:
             start_date = end_date = None
     
-    # Get filtered logs
-    logs = log_manager.get_logs(
+    # Get one page of filtered logs
+    logs, next_cursor = log_manager.get_logs_page(
         level=level,
         start_date=start_date,
-        end_date=end_date if start_date else None
+        end_date=end_date if start_date else None,
+        cursor=cursor,
+        query=query
     )
     
-    return render_template('admin/logs.html', logs=logs)
+    return render_template('admin/logs.html', logs=logs, next_cursor=next_cursor)
 
 @admin_bp.route('/logs/download')
 @login_required
 @admin_required
 def download_logs():
-    """Download logs as JSON"""
+    """Download logs as newline-delimited JSON, streamed and optionally gzipped"""
     level = request.args.get('level', None)
     date_str = request.args.get('date', None)
+    compress = request.args.get('gzip') == '1'
+    query = request.args.get('q', '').strip() or None
     
     # Parse date filter if provided
     start_date = None
@@ -105,14 +121,71 @@ def download_logs():
         except ValueError:
             start_date = end_date = None
     
-    # Export logs
-    logs_json = log_manager.export_logs(
+    # Stream the export
+    chunks = log_manager.iter_export(
         level=level,
         start_date=start_date,
-        end_date=end_date if start_date else None
+        end_date=end_date if start_date else None,
+        query=query,
+        compress=compress
     )
+    # Name the file from the parsed date, never the raw parameter, so the header stays well formed
+    filename = f"logs_{(start_date or datetime.now()).strftime('%Y-%m-%d')}.ndjson"
+    if compress:
+        filename += '.gz'
     
-    return jsonify({'logs': logs_json})
+    return Response(chunks,
+                    mimetype='application/gzip' if compress else 'application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@admin_bp.route('/logs/stream')
+@login_required
+@admin_required
+def stream_logs():
+    """Live tail of new log entries as Server-Sent Events"""
+    level = request.args.get('level', None)
+    query = request.args.get('q', '').strip() or None
+    
+    def generate():
+        for entry in log_manager.follow(level=level, query=query):
+            if entry is None:
+                # Comment frame so dropped connections are noticed
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: log\ndata: {json.dumps(asdict(entry), default=str)}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@admin_bp.route('/logs/metrics')
+@login_required
+@admin_required
+def log_metrics():
+    """Log counts per level or logger as a time series for charts"""
+    resolution = request.args.get('resolution', 'hour')
+    by = request.args.get('by', 'level')
+    since = request.args.get('since', None, type=int)
+    until = request.args.get('until', None, type=int)
+    
+    try:
+        # Timestamps are epoch milliseconds, as chart libraries expect
+        data = log_manager.metrics.series(
+            resolution=resolution,
+            since=since / 1000 if since is not None else None,
+            until=until / 1000 if until is not None else None,
+            by=by
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    data['timestamps'] = [ts * 1000 for ts in data['timestamps']]
+    return jsonify(data)
 
 @admin_bp.route('/logs/clear', methods=['POST'])
 @login_required
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, jsonify, current_app
+from flask import Blueprint, render_template, jsonify, current_app, request
 from flask_login import login_required
 from ..services.ai_service import ai_service
 from ..utils.ai_config import ai_config
@@ -10,14 +10,19 @@ bp = Blueprint('ai_console', __name__, url_prefix='/ai-console')
 def index():
     """AI Console dashboard."""
     return render_template('ai_console/index.html',
-                         api_status=ai_service.check_api_status(),
+                         api_status=ai_service.get_cached_api_status(),
                          usage_stats=ai_service.get_usage_stats('24h'))
 
 @bp.route('/api-status')
 @login_required
 def api_status():
-    """Get current API status."""
-    return jsonify(ai_service.check_api_status())
+    """Get the cached API status.
+    
+    Pass ``refresh=1`` to trigger a background re-check; the cached value is
+    returned immediately either way.
+    """
+    refresh = request.args.get('refresh') == '1'
+    return jsonify(ai_service.get_cached_api_status(refresh=refresh))
 
 @bp.route('/usage-stats/<timeframe>')
 @login_required
@@ -6,6 +6,7 @@ It includes routes for:
 - Starting new conversations
 - Viewing conversation history
 - Managing active conversations
+- Streaming avatar replies to the browser over Server-Sent Events
 
 Dependencies:
     - Flask: Core framework and routing
@@ -13,15 +14,37 @@ Dependencies:
     - Models: Avatar and Conversation models
 """
 
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
+import json
+from datetime import datetime
+from flask import (Blueprint, render_template, redirect, url_for, flash, request, jsonify,
+                   Response, stream_with_context)
 from flask_login import login_required, current_user
 from app.models.avatar import Avatar
 from app.models.conversation import Conversation, Message
 from app.services.ai_service import ai_service
+from app.services.prompt_builder import build_chat_messages
 from app import db
 
 conversation_bp = Blueprint('conversation', __name__)
 
+def _build_chat_messages(conversation, message_content):
+    """Build the message list sent to the AI service for a new user message.
+    
+    History is packed newest first up to the prompt token budget. Call this
+    before the new user message is added to the session so the message is
+    not picked up twice from the conversation history.
+    """
+    avatar = conversation.avatar
+    return build_chat_messages(
+        f"You are {avatar.name}, {avatar.personality}. Respond in character.",
+        conversation.iter_recent_messages(),
+        message_content
+    )
+
+def _sse_event(event, data):
+    """Format a single Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @conversation_bp.route('/start/<int:avatar_id>')
 @login_required
 def start(avatar_id):
@@ -75,6 +98,9 @@ def send_message(conversation_id):
         return redirect(url_for('conversation.view', conversation_id=conversation_id))
     
     try:
+        # Prepare conversation history for context
+        messages = _build_chat_messages(conversation, message_content)
+        
         # Add user message
         user_message = Message(
             conversation_id=conversation_id,
@@ -83,32 +109,6 @@ def send_message(conversation_id):
         )
         db.session.add(user_message)
         
-        # Prepare conversation history for context
-        recent_messages = conversation.get_recent_messages(5)  # Get last 5 messages
-        messages = []
-        
-        # Add system message with avatar personality
-        avatar = conversation.avatar
-        system_message = {
-            'role': 'system',
-            'content': f"You are {avatar.name}, {avatar.personality}. Respond in character."
-        }
-        messages.append(system_message)
-        
-        # Add conversation history
-        for msg in reversed(recent_messages):
-            role = 'user' if msg.is_user else 'assistant'
-            messages.append({
-                'role': role,
-                'content': msg.content
-            })
-        
-        # Add current message
-        messages.append({
-            'role': 'user',
-            'content': message_content
-        })
-        
         # Get AI response
         response = ai_service.generate_chat_response(
             messages,
@@ -148,4 +148,88 @@ def send_message(conversation_id):
                 'message': error_msg
             }), 500
     
-    return redirect(url_for('conversation.view', conversation_id=conversation_id)) 
\ No newline at end of file
+    return redirect(url_for('conversation.view', conversation_id=conversation_id)) 
+
+@conversation_bp.route('/stream/<int:conversation_id>', methods=['POST'])
+@login_required
+def stream_message(conversation_id):
+    """Send a message and stream the avatar's reply as Server-Sent Events.
+    
+    Emits ``token`` events carrying content deltas as they arrive from the
+    AI service, then a single ``done`` event with the saved message, or an
+    ``error`` event if generation fails.
+    """
+    conversation = Conversation.query.get_or_404(conversation_id)
+    
+    if conversation.user_id != current_user.id:
+        return jsonify({
+            'status': 'error',
+            'message': 'Access denied.'
+        }), 403
+    
+    message_content = request.form.get('message')
+    if not message_content:
+        return jsonify({
+            'status': 'error',
+            'message': 'Message cannot be empty.'
+        }), 400
+    
+    # Persist the user message before streaming starts
+    messages = _build_chat_messages(conversation, message_content)
+    user_message = Message(
+        conversation_id=conversation_id,
+        content=message_content,
+        is_user=True
+    )
+    db.session.add(user_message)
+    conversation.last_message_at = datetime.utcnow()
+    db.session.commit()
+    
+    def generate():
+        try:
+            result = None
+            for event in ai_service.stream_chat_response(
+                messages,
+                context=conversation.context
+            ):
+                if 'delta' in event:
+                    yield _sse_event('token', {'delta': event['delta']})
+                else:
+                    result = event
+            
+            if result is None:
+                raise RuntimeError('AI response stream ended unexpectedly')
+            
+            # Save the complete AI response once the stream has finished
+            ai_message = Message(
+                conversation_id=conversation_id,
+                content=result['content'],
+                is_user=False,
+                message_data={
+                    'tokens': result['usage'].get('total_tokens', 0),
+                    'model': result['model']
+                }
+            )
+            db.session.add(ai_message)
+            conversation.last_message_at = datetime.utcnow()
+            db.session.commit()
+            
+            yield _sse_event('done', {
+                'status': 'success',
+                'message': ai_message.to_dict()
+            })
+        except Exception as e:
+            db.session.rollback()
+            yield _sse_event('error', {
+                'status': 'error',
+                'message': f"Error processing message: {str(e)}"
+            })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
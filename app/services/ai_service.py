@@ -1,27 +1,281 @@
+import asyncio
+import copy
 import json
+import os
+import random
+import threading
+import time
+from collections import deque
+import aiohttp
 import requests
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from datetime import datetime
 from ..utils.ai_config import ai_config
+from .usage_metrics import UsageMetrics
+from .rate_limiter import TokenBucketLimiter
+from .response_cache import ResponseCache
+from .singleflight import SingleFlight
+from .prompt_builder import estimate_message_tokens
 from flask import current_app
 from app.utils.log_manager import log_manager
 
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of request volume.
+    
+    Every request deposits ``ratio`` tokens and every retry spends one, so
+    retries stay bounded even when the upstream API is failing hard.
+    """
+    
+    def __init__(self, ratio, max_tokens):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+    
+    def deposit(self):
+        """Credit the budget for one outgoing request."""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+    
+    def try_spend(self):
+        """Spend one retry if the budget allows it."""
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+class AIHttpClient:
+    """Pooled keep-alive HTTP client for the OpenAI API.
+    
+    Each worker process keeps one ``requests.Session`` so TLS connections are
+    reused across calls. Every call passes the rate limiter and has connect
+    and read timeouts, failed calls are retried with jittered exponential
+    backoff while the retry budget allows, and the latency of every call is
+    recorded.
+    """
+    
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+    
+    def __init__(self, config, metrics=None):
+        self.config = config
+        self.metrics = metrics
+        self.limiter = TokenBucketLimiter.from_config(config)
+        self.retry_budget = RetryBudget(config.retry_budget_ratio, config.retry_budget_max)
+        self.call_history = deque(maxlen=1000)
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """The pooled session for the current worker process."""
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                # Sockets must not be shared with a forked parent process
+                if self._session is None or self._session_pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=self.config.pool_maxsize
+                    )
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+                    self._session_pid = pid
+        return self._session
+    
+    def request(self, method, path, tokens=0, **kwargs):
+        """Send a request to the API, retrying transient failures.
+        
+        Args:
+            method (str): HTTP method
+            path (str): Path relative to ``config.api_base_url``
+            tokens (int): Estimated tokens, charged against the rate limiter
+            **kwargs: Extra arguments passed to ``requests.Session.request``
+            
+        Returns:
+            requests.Response: The final response, which may be an error status
+            
+        Raises:
+            RateLimitExceeded: If the rate limiter rejects the call
+        """
+        method = method.upper()
+        url = f"{self.config.api_base_url.rstrip('/')}/{path.lstrip('/')}"
+        kwargs.setdefault('headers', self.config.headers)
+        kwargs.setdefault('timeout', (self.config.connect_timeout, self.config.read_timeout))
+        idempotent = method in self.IDEMPOTENT_METHODS
+        
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            self._wait_for_capacity(tokens)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_call(method, path, None, start)
+                # A connect timeout never reached the server, so it is always safe to retry
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if not (retryable and self._can_retry(attempt)):
+                    raise
+                retry_after = None
+            else:
+                self._record_call(method, path, response.status_code, start)
+                # 429 means the request was rejected before processing
+                retryable = idempotent or response.status_code == 429
+                if (response.status_code not in self.RETRY_STATUSES
+                        or not (retryable and self._can_retry(attempt))):
+                    return response
+                retry_after = response.headers.get('Retry-After')
+                response.close()
+            
+            time.sleep(self._backoff_delay(attempt, retry_after))
+            attempt += 1
+    
+    async def request_json_async(self, session, method, path, tokens=0, paced=False, **kwargs):
+        """Async counterpart of ``request`` using a shared aiohttp session.
+        
+        Follows the same rate limiting, retry and latency recording rules.
+        
+        Args:
+            session (aiohttp.ClientSession): Session whose connection pool is used
+            method (str): HTTP method
+            path (str): Path relative to ``config.api_base_url``
+            tokens (int): Estimated tokens, charged against the rate limiter
+            paced (bool): Wait for rate limiter capacity however long it
+                takes instead of being rejected, for offline callers
+            **kwargs: Extra arguments passed to ``session.request``
+            
+        Returns:
+            dict: The decoded JSON response body
+            
+        Raises:
+            aiohttp.ClientResponseError: If the final response is an error status
+            RateLimitExceeded: If the rate limiter rejects the call, unless paced
+        """
+        method = method.upper()
+        url = f"{self.config.api_base_url.rstrip('/')}/{path.lstrip('/')}"
+        idempotent = method in self.IDEMPOTENT_METHODS
+        
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            if paced:
+                wait = await self.limiter.acquire_paced_async(tokens)
+            else:
+                wait = await self.limiter.acquire_async(tokens)
+            if wait > 0 and self.metrics is not None:
+                self.metrics.record_limiter_wait(wait * 1000)
+            
+            start = time.perf_counter()
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    self._record_call(method, path, response.status, start)
+                    retryable = idempotent or response.status == 429
+                    if (response.status not in self.RETRY_STATUSES
+                            or not (retryable and self._can_retry(attempt))):
+                        response.raise_for_status()
+                        return await response.json()
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self._record_call(method, path, None, start)
+                # Connection failures before a response are only retried when idempotent
+                retryable = idempotent or isinstance(e, aiohttp.ClientConnectorError)
+                if not (retryable and self._can_retry(attempt)):
+                    raise
+                retry_after = None
+            
+            await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+            attempt += 1
+    
+    def get(self, path, **kwargs):
+        """Send a GET request to the API."""
+        return self.request('GET', path, **kwargs)
+    
+    def post(self, path, **kwargs):
+        """Send a POST request to the API."""
+        return self.request('POST', path, **kwargs)
+    
+    def get_latency_stats(self):
+        """Summarise the latency of recent calls in milliseconds."""
+        latencies = sorted(call['latency_ms'] for call in list(self.call_history))
+        if not latencies:
+            return {'count': 0, 'avg': 0, 'p50': 0, 'p95': 0, 'max': 0}
+        
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+        
+        return {
+            'count': len(latencies),
+            'avg': round(sum(latencies) / len(latencies), 1),
+            'p50': round(percentile(0.50), 1),
+            'p95': round(percentile(0.95), 1),
+            'max': round(latencies[-1], 1)
+        }
+    
+    def _wait_for_capacity(self, tokens):
+        """Pass the rate limiter, recording any time spent queued."""
+        wait = self.limiter.acquire(tokens)
+        if wait > 0 and self.metrics is not None:
+            self.metrics.record_limiter_wait(wait * 1000)
+    
+    def _can_retry(self, attempt):
+        """Check the attempt limit and spend from the retry budget."""
+        return attempt < self.config.max_retries and self.retry_budget.try_spend()
+    
+    def _backoff_delay(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, honouring Retry-After when sent."""
+        cap = min(self.config.retry_backoff_max, self.config.retry_backoff_base * (2 ** attempt))
+        delay = random.uniform(0, cap)
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.config.retry_backoff_max))
+            except ValueError:
+                pass
+        return delay
+    
+    def _record_call(self, method, path, status_code, start):
+        """Record the latency of a single attempt.
+        
+        For streamed responses this is the time until headers arrived.
+        """
+        self.call_history.append({
+            'timestamp': datetime.now(),
+            'method': method,
+            'path': path,
+            'status': status_code,
+            'latency_ms': (time.perf_counter() - start) * 1000
+        })
+
 class AIService:
     """Service class for handling AI operations and monitoring."""
     
     def __init__(self):
         self.config = ai_config
-        self.request_history = []
+        self.metrics = UsageMetrics()
+        self.http = AIHttpClient(ai_config, metrics=self.metrics)
+        self.response_cache = ResponseCache(
+            max_entries=ai_config.response_cache_max_entries,
+            ttl=ai_config.response_cache_ttl,
+            persist_path=ai_config.response_cache_path
+        )
+        self.inflight = SingleFlight()
         self.error_history = []
         
+        # Cached API status, kept fresh by a background thread
+        self._status_snapshot = None
+        self._status_lock = threading.Lock()
+        self._status_wakeup = threading.Event()
+        self._status_refresher_pid = None
+        
     def check_api_status(self):
         """Check the API connection and model availability."""
         try:
             # Basic API health check
-            headers = self.config.headers
-            response = requests.get(
-                "https://api.openai.com/v1/models",
-                headers=headers
-            )
+            response = self.http.get('/models')
             
             if response.status_code == 200:
                 models = response.json()
@@ -49,52 +303,103 @@ class AIService:
             
         return status
     
+    def get_cached_api_status(self, refresh=False):
+        """Return the latest API status without making a remote call.
+        
+        The snapshot is kept up to date by a background refresher started on
+        first use. The result carries ``age_seconds`` and a ``stale`` flag so
+        callers can tell how old it is.
+        
+        Args:
+            refresh (bool): Ask the refresher to run a check now; the cached
+                value is still returned immediately
+        """
+        self._ensure_status_refresher()
+        if refresh:
+            self._status_wakeup.set()
+        
+        with self._status_lock:
+            snapshot = self._status_snapshot
+        
+        if snapshot is None:
+            return {
+                'api_connected': False,
+                'pending': True,
+                'error': 'Status check pending',
+                'timestamp': None,
+                'age_seconds': None,
+                'stale': True
+            }
+        
+        age = time.time() - snapshot['checked_at']
+        status = dict(snapshot['status'])
+        status['age_seconds'] = round(age, 1)
+        status['stale'] = age > self.config.status_ttl
+        return status
+    
+    def refresh_api_status(self):
+        """Run a status check and store it as the cached snapshot."""
+        status = self.check_api_status()
+        with self._status_lock:
+            self._status_snapshot = {
+                'status': status,
+                'checked_at': time.time()
+            }
+        return status
+    
+    def _ensure_status_refresher(self):
+        """Start the background status refresher once per worker process."""
+        pid = os.getpid()
+        if self._status_refresher_pid == pid:
+            return
+        with self._status_lock:
+            if self._status_refresher_pid == pid:
+                return
+            self._status_refresher_pid = pid
+            threading.Thread(
+                target=self._refresh_status_loop,
+                name='ai-status-refresher',
+                daemon=True
+            ).start()
+    
+    def _refresh_status_loop(self):
+        """Refresh the status snapshot periodically or when woken."""
+        while True:
+            self._status_wakeup.clear()
+            try:
+                self.refresh_api_status()
+            except Exception as e:
+                log_manager.logger.error(f"AI status refresh failed: {e}")
+            self._status_wakeup.wait(self.config.status_refresh_interval)
+    
     def get_usage_stats(self, timeframe='1h'):
-        """Get usage statistics for the specified timeframe."""
-        now = datetime.now()
-        if timeframe == '1h':
-            start_time = now - timedelta(hours=1)
-        elif timeframe == '24h':
-            start_time = now - timedelta(days=1)
-        elif timeframe == '7d':
-            start_time = now - timedelta(days=7)
-        else:
-            raise ValueError(f"Invalid timeframe: {timeframe}")
-            
-        # Filter request history by timeframe
-        relevant_requests = [
-            req for req in self.request_history 
-            if req['timestamp'] >= start_time
-        ]
-        
-        # Calculate statistics
-        total_requests = len(relevant_requests)
-        total_tokens = sum(req.get('tokens', 0) for req in relevant_requests)
-        total_errors = len([
-            err for err in self.error_history 
-            if err['timestamp'] >= start_time
-        ])
+        """Get usage statistics for the specified timeframe.
         
-        return {
-            'timeframe': timeframe,
-            'total_requests': total_requests,
-            'total_tokens': total_tokens,
-            'total_errors': total_errors,
-            'estimated_cost': total_tokens * self.config.cost_per_token
-        }
+        Args:
+            timeframe (str): One of '1h', '24h', '7d' or '30d'
+            
+        Raises:
+            ValueError: If the timeframe is not supported
+        """
+        stats = self.metrics.summary(timeframe)
+        stats['timeframe'] = timeframe
+        stats['estimated_cost'] = stats['total_tokens'] * self.config.cost_per_token
+        stats['api_latency_ms'] = self.http.get_latency_stats()
+        stats['rate_limiter'] = self.http.limiter.stats()
+        stats['cache']['entries'] = self.response_cache.stats()['entries']
+        stats['coalescing'] = self.inflight.stats()
+        return stats
     
-    def log_request(self, request_type, tokens=0, metadata=None):
-        """Log an API request for monitoring."""
-        self.request_history.append({
-            'timestamp': datetime.now(),
-            'type': request_type,
-            'tokens': tokens,
-            'metadata': metadata or {}
-        })
+    def log_request(self, request_type, tokens=0, metadata=None, latency_ms=None):
+        """Log an API request for monitoring.
         
-        # Trim history if too long
-        if len(self.request_history) > 1000:
-            self.request_history = self.request_history[-1000:]
+        Args:
+            request_type (str): Type of request (e.g., 'chat', 'chat_stream')
+            tokens (int): Tokens used by the request
+            metadata (dict, optional): Additional request context
+            latency_ms (float, optional): End-to-end duration of the request
+        """
+        self.metrics.record_request(tokens=tokens, latency_ms=latency_ms)
     
     def log_error(self, error_type, message, metadata=None):
         """Log an error for monitoring.
@@ -113,6 +418,7 @@ class AIService:
         
         # Add to error history
         self.error_history.append(error)
+        self.metrics.record_error()
         
         # Trim history if too long
         if len(self.error_history) > 100:
@@ -124,18 +430,53 @@ class AIService:
             extra={'metadata': metadata} if metadata else None
         )
 
-    def generate_chat_response(self, messages, context=None):
+    def generate_chat_response(self, messages, context=None, use_cache=True):
         """Generate a chat response using the OpenAI API.
         
         Args:
             messages (list): List of message dictionaries with 'role' and 'content'
             context (dict, optional): Additional context for the conversation
+            use_cache (bool): Serve repeated prompts from the response cache
             
         Returns:
             dict: The API response containing the generated message
         """
+        payload = self._chat_payload(messages)
+        cache_key = self._cache_key(payload, use_cache)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
+        
+        if not self.config.coalesce_requests:
+            return self._request_chat_completion(payload, cache_key, context)
+        
+        # Concurrent identical prompts share one upstream call
+        result, shared = self.inflight.do(
+            ResponseCache.make_key(payload),
+            lambda: self._request_chat_completion(payload, cache_key, context)
+        )
+        return copy.deepcopy(result) if shared else result
+    
+    def _request_chat_completion(self, payload, cache_key, context=None):
+        """Call the chat completions endpoint and cache the result.
+        
+        Args:
+            payload (dict): Request body built by ``_chat_payload``
+            cache_key (str): Response cache key, or None when not caching
+            context (dict, optional): Additional context for the conversation
+            
+        Returns:
+            dict: The API response containing the generated message
+        """
+        messages = payload['messages']
+        # An identical request may have filled the cache while this one queued
+        if cache_key is not None:
+            cached = self.response_cache.peek(cache_key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+        
+        start = time.perf_counter()
         try:
-            # TODO: Implement actual API call
             log_manager.logger.info(
                 "Generating chat response",
                 extra={
@@ -143,10 +484,22 @@ class AIService:
                     'context': context
                 }
             )
-            return {
-                'role': 'assistant',
-                'content': 'This is a placeholder response.'
-            }
+            response = self.http.post(
+                '/chat/completions',
+                tokens=self._estimate_prompt_tokens(messages),
+                json=payload
+            )
+            response.raise_for_status()
+            result = response.json()
+            self._cache_store(cache_key, result)
+            
+            self.log_request(
+                'chat',
+                tokens=result.get('usage', {}).get('total_tokens', 0),
+                metadata={'model': result.get('model'), 'message_count': len(messages)},
+                latency_ms=(time.perf_counter() - start) * 1000
+            )
+            return result
         except Exception as e:
             self.log_error(
                 'API Error',
@@ -158,5 +511,237 @@ class AIService:
             )
             raise
 
+    async def generate_chat_responses(self, batch, max_concurrency=8, use_cache=True):
+        """Generate chat responses for many conversations concurrently.
+        
+        All requests share one event loop and one aiohttp connection pool, and
+        still pass through the rate limiter. They are paced by it rather than
+        rejected, and yield to interactive callers waiting for capacity, so a
+        large batch takes longer instead of failing. Intended for offline
+        jobs; call it with ``asyncio.run(ai_service.generate_chat_responses(batch))``.
+        
+        Args:
+            batch (list): List of message lists, one per conversation
+            max_concurrency (int): Maximum number of requests in flight
+            use_cache (bool): Serve repeated prompts from the response cache
+            
+        Returns:
+            list: One dict per batch item, in input order. Successful items are
+                ``{'response': dict}`` and failed items are ``{'error': str}``.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        timeout = aiohttp.ClientTimeout(
+            sock_connect=self.config.connect_timeout,
+            sock_read=self.config.read_timeout
+        )
+        connector = aiohttp.TCPConnector(limit=max_concurrency)
+        
+        async with aiohttp.ClientSession(
+            headers=self.config.headers,
+            timeout=timeout,
+            connector=connector
+        ) as session:
+            
+            async def generate(messages):
+                payload = self._chat_payload(messages)
+                cache_key = self._cache_key(payload, use_cache)
+                cached = self._cache_lookup(cache_key)
+                if cached is not None:
+                    return {'response': cached}
+                
+                async with semaphore:
+                    start = time.perf_counter()
+                    try:
+                        result = await self.http.request_json_async(
+                            session,
+                            'POST',
+                            '/chat/completions',
+                            tokens=self._estimate_prompt_tokens(messages),
+                            paced=True,
+                            json=payload
+                        )
+                    except Exception as e:
+                        self.log_error(
+                            'API Error',
+                            str(e) or type(e).__name__,
+                            metadata={'message_count': len(messages), 'batch': True}
+                        )
+                        return {'error': str(e) or type(e).__name__}
+                    
+                    self.log_request(
+                        'chat_batch',
+                        tokens=result.get('usage', {}).get('total_tokens', 0),
+                        metadata={'model': result.get('model'), 'message_count': len(messages)},
+                        latency_ms=(time.perf_counter() - start) * 1000
+                    )
+                    self._cache_store(cache_key, result)
+                    return {'response': result}
+            
+            return await asyncio.gather(*(generate(messages) for messages in batch))
+    
+    def _cache_key(self, payload, use_cache=True):
+        """Response cache key for a request, or None when caching is off."""
+        if not (use_cache and self.config.response_cache_enabled):
+            return None
+        return ResponseCache.make_key(payload)
+    
+    def _cache_lookup(self, cache_key):
+        """Return a copy of a cached completion and record the lookup."""
+        if cache_key is None:
+            return None
+        completion = self.response_cache.get(cache_key)
+        self.metrics.record_cache_lookup(hit=completion is not None)
+        return copy.deepcopy(completion) if completion is not None else None
+    
+    def _cache_store(self, cache_key, completion):
+        """Store a completion under its cache key when caching is on."""
+        if cache_key is not None:
+            self.response_cache.set(cache_key, copy.deepcopy(completion))
+    
+    def _estimate_prompt_tokens(self, messages):
+        """Estimated prompt size, charged against the token rate limit."""
+        return sum(estimate_message_tokens(message) for message in messages)
+    
+    def _chat_payload(self, messages, stream=False):
+        """Build the request body for a chat completion."""
+        model_config = self.config.get_model_config('text')
+        payload = {
+            'model': model_config['model'],
+            'messages': messages,
+            'max_tokens': model_config['max_tokens']
+        }
+        if stream:
+            payload['stream'] = True
+            payload['stream_options'] = {'include_usage': True}
+        return payload
+    
+    def stream_chat_response(self, messages, context=None, use_cache=True):
+        """Stream a chat response from the OpenAI API as token deltas.
+        
+        A cached reply is sent as a single delta. With ``coalesce_requests``
+        on, concurrent identical requests share one upstream stream; callers
+        that join late first receive the deltas sent so far.
+        
+        Args:
+            messages (list): List of message dictionaries with 'role' and 'content'
+            context (dict, optional): Additional context for the conversation
+            use_cache (bool): Serve repeated prompts from the response cache
+            
+        Yields:
+            dict: ``{'delta': str}`` for each content fragment as it arrives,
+                followed by one final ``{'done': True, 'content': str,
+                'usage': dict, 'model': str}`` once the stream completes
+        """
+        model_config = self.config.get_model_config('text')
+        payload = self._chat_payload(messages, stream=True)
+        cache_key = self._cache_key(payload, use_cache)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            content = cached['choices'][0]['message']['content']
+            yield {'delta': content}
+            yield {
+                'done': True,
+                'content': content,
+                'usage': cached.get('usage', {}),
+                'model': cached.get('model', model_config['model']),
+                'cached': True
+            }
+            return
+        
+        if not self.config.coalesce_requests:
+            yield from self._stream_chat_completion(payload, cache_key, context)
+            return
+        
+        # Concurrent identical prompts share one upstream stream
+        for event, shared in self.inflight.stream(
+            ResponseCache.make_key(payload),
+            lambda: self._stream_chat_completion(payload, cache_key, context)
+        ):
+            yield copy.deepcopy(event) if shared else event
+    
+    def _stream_chat_completion(self, payload, cache_key, context=None):
+        """Stream the chat completions endpoint and cache the full reply.
+        
+        Args:
+            payload (dict): Streaming request body built by ``_chat_payload``
+            cache_key (str): Response cache key, or None when not caching
+            context (dict, optional): Additional context for the conversation
+            
+        Yields:
+            dict: The events described in ``stream_chat_response``
+        """
+        messages = payload['messages']
+        start = time.perf_counter()
+        
+        try:
+            log_manager.logger.info(
+                "Streaming chat response",
+                extra={
+                    'message_count': len(messages),
+                    'context': context
+                }
+            )
+            
+            parts = []
+            usage = {}
+            model = payload['model']
+            with self.http.post(
+                '/chat/completions',
+                tokens=self._estimate_prompt_tokens(messages),
+                json=payload,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    # Server-sent events: only "data:" lines carry chunks
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    
+                    chunk = json.loads(data)
+                    model = chunk.get('model') or model
+                    if chunk.get('usage'):
+                        usage = chunk['usage']
+                    for choice in chunk.get('choices') or []:
+                        delta = (choice.get('delta') or {}).get('content')
+                        if delta:
+                            parts.append(delta)
+                            yield {'delta': delta}
+            
+            self.log_request(
+                'chat_stream',
+                tokens=usage.get('total_tokens', 0),
+                metadata={'model': model, 'message_count': len(messages)},
+                latency_ms=(time.perf_counter() - start) * 1000
+            )
+            content = ''.join(parts)
+            self._cache_store(cache_key, {
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content}
+                }],
+                'usage': usage
+            })
+            yield {
+                'done': True,
+                'content': content,
+                'usage': usage,
+                'model': model
+            }
+        except Exception as e:
+            self.log_error(
+                'API Error',
+                str(e),
+                metadata={
+                    'message_count': len(messages),
+                    'context': context,
+                    'stream': True
+                }
+            )
+            raise
+
 # Create a singleton instance
 ai_service = AIService() 
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Prompt Builder
+
+This module assembles the message list sent to the AI service for a chat
+turn. Instead of a fixed window of recent messages it packs as much history
+as fits in a token budget, newest first, after reserving room for the
+model's output. Token counts come from a fast local estimator and are cached
+on each stored message so they are computed only once.
+
+Dependencies:
+    - ai_config: For context window and output token limits
+"""
+
+from ..utils.ai_config import ai_config
+
+# Tokens the chat format adds per message for role and separators
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text):
+    """Estimate the token count of a piece of text without a tokenizer.
+    
+    Uses roughly four characters per token, but never fewer tokens than
+    1.3 per word, which keeps short-word and non-English text from being
+    undercounted.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, int(len(text.split()) * 1.3)) + 1
+
+def estimate_message_tokens(message):
+    """Estimate the tokens used by one chat message dictionary."""
+    return estimate_tokens(message.get('content')) + MESSAGE_OVERHEAD_TOKENS
+
+def get_prompt_budget(config=ai_config):
+    """Tokens available for the prompt once output room is reserved."""
+    return max(0, min(
+        config.prompt_token_budget,
+        config.max_context_tokens - config.max_output_tokens
+    ))
+
+def stored_message_tokens(message):
+    """Token estimate for a stored Message, cached in its message_data."""
+    tokens = message.get_data('token_count')
+    if tokens is None:
+        tokens = estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+        message.set_data('token_count', tokens)
+    return tokens
+
+def build_chat_messages(system_prompt, history, message_content, budget=None, max_history=None):
+    """Build a chat request that fits the prompt token budget.
+    
+    The system prompt and the new user message are always included; older
+    messages are added newest first until the next one would not fit.
+    
+    Args:
+        system_prompt (str): Instructions sent as the system message
+        history (iterable): Stored Message objects, newest first
+        message_content (str): The new user message
+        budget (int, optional): Prompt token budget; defaults to the
+            configured budget
+        max_history (int, optional): Maximum history messages to consider
+    
+    Returns:
+        list: Message dictionaries in chronological order
+    """
+    budget = get_prompt_budget() if budget is None else budget
+    max_history = ai_config.prompt_history_max_messages if max_history is None else max_history
+    
+    system_message = {'role': 'system', 'content': system_prompt}
+    current_message = {'role': 'user', 'content': message_content}
+    remaining = budget - estimate_message_tokens(system_message) - estimate_message_tokens(current_message)
+    
+    selected = []
+    for count, message in enumerate(history):
+        if count >= max_history:
+            break
+        tokens = stored_message_tokens(message)
+        if tokens > remaining:
+            break
+        remaining -= tokens
+        selected.append({
+            'role': 'user' if message.is_user else 'assistant',
+            'content': message.content
+        })
+    
+    return [system_message] + selected[::-1] + [current_message]
@@ -0,0 +1,184 @@
+"""
+Rate Limiter
+
+This module provides a client-side token-bucket limiter for outbound AI API
+calls. It tracks both requests and tokens per minute, lets a bounded number
+of callers wait for capacity, and rejects immediately when the queue is full
+or the wait would exceed the configured maximum delay. Offline batch callers
+use the paced variants instead, which wait as long as it takes and only take
+capacity once it is free, behind any queued interactive callers.
+
+Dependencies:
+    - asyncio: For non-blocking waits in async callers
+    - threading: For thread-safe bucket updates
+    - time: For refill timing and waiting
+"""
+
+import asyncio
+import threading
+import time
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot be admitted by the rate limiter."""
+
+class TokenBucketLimiter:
+    """Token-bucket limiter for requests and tokens per minute.
+    
+    Callers reserve capacity up front, so the buckets may go negative; later
+    callers then wait for their share in arrival order.
+    
+    Attributes:
+        max_queue_size (int): Maximum number of callers allowed to wait
+        max_queue_delay (float): Longest wait in seconds before rejecting
+    """
+    
+    def __init__(self, requests_per_minute, tokens_per_minute, max_queue_size, max_queue_delay):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.request_rate = requests_per_minute / 60.0
+        self.token_rate = tokens_per_minute / 60.0
+        self.max_queue_size = max_queue_size
+        self.max_queue_delay = max_queue_delay
+        
+        self._requests = self.request_capacity
+        self._tokens = self.token_capacity
+        self._updated = time.monotonic()
+        self._waiting = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config):
+        """Create a limiter from the AI configuration."""
+        return cls(
+            config.requests_per_minute,
+            config.tokens_per_minute,
+            config.rate_limit_max_queue,
+            config.rate_limit_max_delay
+        )
+    
+    def acquire(self, tokens=0):
+        """Block until the call may proceed.
+        
+        Args:
+            tokens (int): Estimated tokens the call will consume
+        
+        Returns:
+            float: Seconds spent waiting
+        
+        Raises:
+            RateLimitExceeded: If the wait queue is full or the wait would
+                exceed ``max_queue_delay``
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._release_waiter()
+        return wait
+    
+    async def acquire_async(self, tokens=0):
+        """Async counterpart of ``acquire`` that waits without blocking the loop."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._release_waiter()
+        return wait
+    
+    def acquire_paced(self, tokens=0):
+        """Block until the call may proceed, however long that takes.
+        
+        For offline callers that should slow down rather than fail. They do
+        not join the bounded wait queue and take nothing until capacity is
+        free, so interactive callers queued ahead keep their place.
+        
+        Args:
+            tokens (int): Estimated tokens the call will consume
+        
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self._take_if_free(tokens)
+            if wait == 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+    
+    async def acquire_paced_async(self, tokens=0):
+        """Async counterpart of ``acquire_paced`` that waits without blocking the loop."""
+        waited = 0.0
+        while True:
+            wait = self._take_if_free(tokens)
+            if wait == 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+    
+    def stats(self):
+        """Current limiter state."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'available_requests': round(max(self._requests, 0), 1),
+                'available_tokens': round(max(self._tokens, 0)),
+                'waiting': self._waiting,
+                'rejected': self._rejected
+            }
+    
+    def _reserve(self, tokens):
+        """Take capacity for one call and return how long it must wait."""
+        # A single call larger than the bucket would never fit otherwise
+        tokens = min(tokens, self.token_capacity)
+        with self._lock:
+            wait = self._wait_for(tokens)
+            if wait > 0:
+                if self._waiting >= self.max_queue_size:
+                    self._rejected += 1
+                    raise RateLimitExceeded(
+                        f"AI rate limit queue is full ({self._waiting} calls waiting)"
+                    )
+                if wait > self.max_queue_delay:
+                    self._rejected += 1
+                    raise RateLimitExceeded(
+                        f"AI rate limit wait of {wait:.1f}s exceeds the "
+                        f"{self.max_queue_delay:.1f}s maximum"
+                    )
+                self._waiting += 1
+            
+            self._requests -= 1
+            self._tokens -= tokens
+            return wait
+    
+    def _take_if_free(self, tokens):
+        """Take capacity for one call if it is free now, else return how long until it is."""
+        tokens = min(tokens, self.token_capacity)
+        with self._lock:
+            wait = self._wait_for(tokens)
+            if wait == 0:
+                self._requests -= 1
+                self._tokens -= tokens
+            return wait
+    
+    def _wait_for(self, tokens):
+        """Seconds until one request and ``tokens`` are available. Caller holds the lock."""
+        self._refill(time.monotonic())
+        return max(
+            0.0,
+            (1 - self._requests) / self.request_rate,
+            (tokens - self._tokens) / self.token_rate
+        )
+    
+    def _release_waiter(self):
+        with self._lock:
+            self._waiting -= 1
+    
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.request_capacity, self._requests + elapsed * self.request_rate)
+        self._tokens = min(self.token_capacity, self._tokens + elapsed * self.token_rate)
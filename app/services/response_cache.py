@@ -0,0 +1,149 @@
+"""
+Response Cache
+
+This module provides an in-memory cache for AI chat completions. Entries are
+keyed on a normalised hash of the request messages, model and sampling
+parameters, evicted in LRU order once the cache is full, and expire after a
+TTL. The cache can optionally be saved to and reloaded from a JSON file.
+
+Dependencies:
+    - hashlib: For request key hashing
+    - threading: For thread-safe access
+    - json: For key normalisation and persistence
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Request fields that do not affect the completion content
+_UNKEYED_FIELDS = ('messages', 'stream', 'stream_options')
+
+class ResponseCache:
+    """Bounded LRU cache of chat completions with per-entry expiry.
+    
+    Attributes:
+        max_entries (int): Maximum number of cached completions
+        ttl (float): Seconds an entry stays valid
+        persist_path (str): Optional JSON file the cache is saved to
+    """
+    
+    def __init__(self, max_entries=1000, ttl=3600, persist_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, completion)
+        self._lock = threading.Lock()
+        
+        if persist_path:
+            self.load()
+            atexit.register(self.save)
+    
+    @staticmethod
+    def make_key(payload):
+        """Hash a chat completion request into a cache key.
+        
+        Message content is stripped and runs of whitespace are collapsed, so
+        trivially different spellings of the same prompt share one entry.
+        """
+        messages = [
+            {
+                'role': message.get('role'),
+                'content': ' '.join((message.get('content') or '').split())
+            }
+            for message in payload.get('messages', [])
+        ]
+        params = {k: v for k, v in payload.items() if k not in _UNKEYED_FIELDS}
+        blob = json.dumps(
+            {'messages': messages, 'params': params},
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Return the cached completion for ``key``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def peek(self, key):
+        """Return the cached completion for ``key`` without counting a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return None
+            return entry[1]
+    
+    def set(self, key, completion):
+        """Store a completion, evicting the least recently used if full."""
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, completion)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove all cached completions."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        """Lifetime hit and miss counts for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0,
+                'entries': len(self._entries)
+            }
+    
+    def save(self):
+        """Write unexpired entries to ``persist_path``."""
+        if not self.persist_path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, expires_at, completion]
+                for key, (expires_at, completion) in self._entries.items()
+                if expires_at > now
+            ]
+        
+        os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+        # Per-process name: every worker saves at exit, possibly at the same moment
+        temp_path = f"{self.persist_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(entries, f, separators=(',', ':'))
+        os.replace(temp_path, self.persist_path)
+    
+    def load(self):
+        """Load unexpired entries from ``persist_path`` if it exists."""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        now = time.time()
+        with self._lock:
+            # Entries were saved oldest first, so LRU order is preserved
+            for key, expires_at, completion in entries[-self.max_entries:]:
+                if expires_at > now:
+                    self._entries[key] = (expires_at, completion)
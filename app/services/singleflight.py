@@ -0,0 +1,190 @@
+"""
+Single-Flight Request Coalescing
+
+This module lets concurrent callers asking for the same thing share one
+execution. The first caller for a key runs the work; callers that arrive
+while it is still running wait for it and receive the same result or
+exception. Streamed work is shared the same way: callers that join late
+receive every item produced so far, then the rest as they arrive.
+
+Dependencies:
+    - threading: For in-flight call tracking and waiting
+"""
+
+import threading
+
+class _Call:
+    """An in-flight call and its outcome."""
+    
+    __slots__ = ('done', 'result', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class _StreamCall:
+    """An in-flight streamed call: the items so far and its outcome."""
+    
+    __slots__ = ('changed', 'items', 'finished', 'error', 'followers')
+    
+    def __init__(self):
+        self.changed = threading.Condition()
+        self.items = []
+        self.finished = False
+        self.error = None
+        self.followers = 0
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key.
+    
+    Attributes:
+        executed (int): Calls that ran the work themselves
+        coalesced (int): Calls that shared another caller's result
+    """
+    
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, fn):
+        """Run ``fn`` unless a call with the same key is already in flight.
+        
+        Args:
+            key (str): Identity of the work, e.g. a request hash
+            fn (callable): Zero-argument function doing the work
+        
+        Returns:
+            tuple: The result and whether it was shared from another call
+        
+        Raises:
+            Exception: Whatever ``fn`` raised, for every caller sharing it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+    
+    def stream(self, key, fn):
+        """Iterate ``fn()`` once for all concurrent callers sharing a key.
+        
+        The first caller iterates the work. Callers that arrive while it is
+        running receive every item it has produced, then each new one as it
+        arrives. If the first caller stops reading early, it finishes the
+        iteration for the others before returning.
+        
+        Args:
+            key (str): Identity of the work, e.g. a request hash
+            fn (callable): Zero-argument function returning an iterator
+        
+        Yields:
+            tuple: Each item and whether it was shared from another call
+        
+        Raises:
+            Exception: Whatever the iteration raised, for every caller sharing it
+        """
+        with self._lock:
+            call = self._streams.get(key)
+            if call is None:
+                call = self._streams[key] = _StreamCall()
+                self.executed += 1
+                leader = True
+            else:
+                call.followers += 1
+                self.coalesced += 1
+                leader = False
+        
+        if leader:
+            yield from self._lead_stream(key, call, fn)
+        else:
+            yield from self._follow_stream(call)
+    
+    def _lead_stream(self, key, call, fn):
+        source = iter(fn())
+        try:
+            for item in source:
+                self._publish(call, item)
+                yield item, False
+        except GeneratorExit:
+            # Our caller stopped reading; callers sharing the stream still need the rest
+            with self._lock:
+                if self._streams.get(key) is call:
+                    del self._streams[key]
+                followers = call.followers
+            if followers:
+                try:
+                    for item in source:
+                        self._publish(call, item)
+                except Exception as e:
+                    call.error = e
+            raise
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._streams.get(key) is call:
+                    del self._streams[key]
+            with call.changed:
+                call.finished = True
+                call.changed.notify_all()
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+    
+    @staticmethod
+    def _publish(call, item):
+        with call.changed:
+            call.items.append(item)
+            call.changed.notify_all()
+    
+    @staticmethod
+    def _follow_stream(call):
+        seen = 0
+        while True:
+            with call.changed:
+                while seen == len(call.items) and not call.finished:
+                    call.changed.wait()
+                items = call.items[seen:]
+                finished = call.finished
+            for item in items:
+                yield item, True
+            seen += len(items)
+            if finished:
+                if call.error is not None:
+                    raise call.error
+                return
+    
+    def stats(self):
+        """Counts of executed and coalesced calls for this process."""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._streams)
+            }
@@ -0,0 +1,207 @@
+"""
+Usage Metrics Store
+
+This module keeps fixed-memory, time-bucketed counters for AI service usage.
+Each recorded event updates one per-minute, one per-hour and one per-day
+bucket in O(1), and a query over a timeframe only sums the buckets that
+overlap it, so stats stay correct at any request volume.
+
+Dependencies:
+    - threading: For thread-safe updates
+"""
+
+import threading
+import time
+
+# Upper bounds (ms) of the latency histogram bins; the last bin is unbounded
+LATENCY_BOUNDS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+class _Bucket:
+    """Counters for one time slot."""
+    
+    __slots__ = ('start', 'requests', 'tokens', 'errors', 'latency_count',
+                 'latency_sum', 'latency_hist', 'limiter_waits', 'limiter_wait_ms',
+                 'cache_hits', 'cache_misses')
+    
+    def __init__(self):
+        self.reset(None)
+    
+    def reset(self, start):
+        self.start = start
+        self.requests = 0
+        self.tokens = 0
+        self.errors = 0
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.latency_hist = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        self.limiter_waits = 0
+        self.limiter_wait_ms = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+class _BucketRing:
+    """Ring of fixed-width buckets; slots are reused as time moves on."""
+    
+    def __init__(self, width, size):
+        self.width = width
+        self.size = size
+        self.buckets = [_Bucket() for _ in range(size)]
+    
+    def bucket_for(self, ts):
+        """Return the bucket covering ``ts``, resetting a reused slot."""
+        index = int(ts // self.width)
+        bucket = self.buckets[index % self.size]
+        start = index * self.width
+        if bucket.start != start:
+            bucket.reset(start)
+        return bucket
+    
+    def overlapping(self, since, until):
+        """Yield buckets that overlap the ``[since, until]`` window."""
+        for bucket in self.buckets:
+            if bucket.start is not None and bucket.start + self.width > since and bucket.start <= until:
+                yield bucket
+
+class UsageMetrics:
+    """Time-bucketed usage counters with O(1) writes and O(buckets) reads.
+    
+    Attributes:
+        TIMEFRAMES (dict): Supported query windows in seconds
+    """
+    
+    TIMEFRAMES = {
+        '1h': 3600,
+        '24h': 86400,
+        '7d': 7 * 86400,
+        '30d': 30 * 86400
+    }
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Each tier covers the longest window it serves plus one partial slot
+        self._rings = [
+            _BucketRing(60, 61),  # per-minute, 1 hour
+            _BucketRing(3600, 169),  # per-hour, 7 days
+            _BucketRing(86400, 31)  # per-day, 30 days
+        ]
+    
+    def record_request(self, tokens=0, latency_ms=None, ts=None):
+        """Record one completed request."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for ring in self._rings:
+                bucket = ring.bucket_for(ts)
+                bucket.requests += 1
+                bucket.tokens += tokens
+                if latency_ms is not None:
+                    bucket.latency_count += 1
+                    bucket.latency_sum += latency_ms
+                    bucket.latency_hist[self._latency_bin(latency_ms)] += 1
+    
+    def record_error(self, ts=None):
+        """Record one failed request."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for ring in self._rings:
+                ring.bucket_for(ts).errors += 1
+    
+    def record_limiter_wait(self, wait_ms, ts=None):
+        """Record time a call spent queued in the rate limiter."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for ring in self._rings:
+                bucket = ring.bucket_for(ts)
+                bucket.limiter_waits += 1
+                bucket.limiter_wait_ms += wait_ms
+    
+    def record_cache_lookup(self, hit, ts=None):
+        """Record one response cache lookup."""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            for ring in self._rings:
+                bucket = ring.bucket_for(ts)
+                if hit:
+                    bucket.cache_hits += 1
+                else:
+                    bucket.cache_misses += 1
+    
+    def summary(self, timeframe, now=None):
+        """Aggregate the buckets overlapping the given timeframe.
+        
+        Results are accurate to the width of the buckets used: minutes for
+        ``1h``, hours for ``24h`` and ``7d``, days for ``30d``.
+        
+        Raises:
+            ValueError: If the timeframe is not supported
+        """
+        if timeframe not in self.TIMEFRAMES:
+            raise ValueError(f"Invalid timeframe: {timeframe}")
+        
+        window = self.TIMEFRAMES[timeframe]
+        now = time.time() if now is None else now
+        since = now - window
+        # Use the finest tier that still spans the whole window
+        ring = next(r for r in self._rings if r.width * (r.size - 1) >= window)
+        
+        requests = tokens = errors = latency_count = limiter_waits = cache_hits = cache_misses = 0
+        latency_sum = limiter_wait_ms = 0.0
+        latency_hist = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        with self._lock:
+            for bucket in ring.overlapping(since, now):
+                requests += bucket.requests
+                tokens += bucket.tokens
+                errors += bucket.errors
+                latency_count += bucket.latency_count
+                latency_sum += bucket.latency_sum
+                limiter_waits += bucket.limiter_waits
+                limiter_wait_ms += bucket.limiter_wait_ms
+                cache_hits += bucket.cache_hits
+                cache_misses += bucket.cache_misses
+                for i, count in enumerate(bucket.latency_hist):
+                    latency_hist[i] += count
+        
+        return {
+            'total_requests': requests,
+            'total_tokens': tokens,
+            'total_errors': errors,
+            'latency_ms': {
+                'count': latency_count,
+                'avg': round(latency_sum / latency_count, 1) if latency_count else 0,
+                'p50': self._percentile(latency_hist, latency_count, 0.50),
+                'p95': self._percentile(latency_hist, latency_count, 0.95),
+                'p99': self._percentile(latency_hist, latency_count, 0.99)
+            },
+            'limiter_wait_ms': {
+                'waits': limiter_waits,
+                'total': round(limiter_wait_ms, 1),
+                'avg': round(limiter_wait_ms / limiter_waits, 1) if limiter_waits else 0
+            },
+            'cache': {
+                'hits': cache_hits,
+                'misses': cache_misses,
+                'hit_ratio': round(cache_hits / (cache_hits + cache_misses), 3) if cache_hits + cache_misses else 0
+            }
+        }
+    
+    @staticmethod
+    def _latency_bin(latency_ms):
+        for i, bound in enumerate(LATENCY_BOUNDS_MS):
+            if latency_ms <= bound:
+                return i
+        return len(LATENCY_BOUNDS_MS)
+    
+    @staticmethod
+    def _percentile(hist, count, p):
+        """Upper bound of the histogram bin holding the given percentile.
+        
+        Values past the last bound are reported as that bound.
+        """
+        if not count:
+            return 0
+        target = p * count
+        seen = 0
+        for i, bin_count in enumerate(hist):
+            seen += bin_count
+            if seen >= target:
+                break
+        return LATENCY_BOUNDS_MS[min(i, len(LATENCY_BOUNDS_MS) - 1)]
@@ -17,11 +17,41 @@ class AIConfig:
         # Context window settings
         self.max_context_tokens = 128000
         self.max_output_tokens = 16384
+        self.prompt_token_budget = 8000  # Upper bound on prompt tokens per chat request
+        self.prompt_history_max_messages = 200  # History messages considered per request
         
         # Rate limiting and monitoring
-        self.requests_per_minute = 50  # Adjustable based on API limits
+        self.requests_per_minute = int(os.getenv('AI_REQUESTS_PER_MINUTE', 50))  # Adjustable based on API limits
+        self.tokens_per_minute = int(os.getenv('AI_TOKENS_PER_MINUTE', 200000))  # Prompt tokens
+        self.rate_limit_max_queue = 20  # Calls allowed to wait for capacity
+        self.rate_limit_max_delay = 10.0  # Seconds a call may wait before rejection
         self.cost_per_token = 0.0001  # Update with actual cost
         
+        # HTTP client settings
+        # Point at a local OpenAI-compatible server (e.g. scripts/stub_openai_server.py) for testing
+        self.api_base_url = os.getenv('OPENAI_BASE_URL', "https://api.openai.com/v1")
+        self.connect_timeout = 5.0  # Seconds to establish a connection
+        self.read_timeout = 60.0  # Seconds to wait between bytes of a response
+        self.pool_maxsize = 10  # Keep-alive connections per worker process
+        self.max_retries = 3
+        self.retry_backoff_base = 0.5  # Seconds, doubled on each attempt
+        self.retry_backoff_max = 8.0
+        self.retry_budget_ratio = 0.1  # Retries allowed per request sent
+        self.retry_budget_max = 10.0  # Retries that may be spent in a burst
+        
+        # Response cache settings
+        self.response_cache_enabled = True
+        self.response_cache_max_entries = 1000
+        self.response_cache_ttl = 3600  # Seconds
+        self.response_cache_path = os.getenv('AI_RESPONSE_CACHE_PATH')  # e.g. storage/data/response_cache.json
+        
+        # Share one upstream call, or stream, between concurrent identical requests
+        self.coalesce_requests = True
+        
+        # API health check settings
+        self.status_refresh_interval = 60  # Seconds between background checks
+        self.status_ttl = 180  # Seconds before a cached status is reported stale
+        
     def validate_config(self):
         """Validate the configuration settings."""
         # In development mode, we'll allow missing or invalid API keys
@@ -0,0 +1,329 @@
+"""
+Log Index Utility
+
+This module maintains a sidecar index for the application log file. The
+index records, for every minute that has log records, the byte offset where
+that minute starts in the log file and how many records of each level it
+holds. Log queries use it to seek straight to the regions that can match a
+date or level filter instead of scanning the whole file.
+
+The index is appended to ``<log file>.idx`` as one JSON object per line
+whenever a minute bucket closes, so keeping it up to date costs one small
+write per minute.
+
+Each bucket also lists the search terms its records contain, and an
+inverted index from term to buckets is kept in memory as records are
+added, so text searches only read buckets that contain every query term.
+
+When the log rotates, the closed segment's time range and level counts are
+recorded in a segment manifest, and its vocabulary in a terms sidecar, so
+queries can skip whole segments.
+
+Dependencies:
+    - json: For the sidecar and manifest formats
+    - threading: For thread-safe access between writers and readers
+"""
+
+import bisect
+import gzip
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+BUCKET_SECONDS = 60
+
+# Search terms are runs of letters, digits and underscores, lowercased
+TERM_PATTERN = re.compile(r'[a-z0-9_]{2,40}')
+
+def extract_terms(text: str) -> Set[str]:
+    """Distinct search terms in a piece of text"""
+    return set(TERM_PATTERN.findall(text.lower())) if text else set()
+
+class LogIndex:
+    """Per-minute byte offset and level count index for one log file.
+    
+    Each bucket is a list ``[start_ts, offset, {level: count}, {terms}]``.
+    Buckets are ordered by offset; the last one is still open and receives
+    new records. ``_postings`` maps each term to the buckets containing it.
+    """
+    
+    def __init__(self, index_path: Path):
+        self.index_path = Path(index_path)
+        self._buckets: List[list] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._persisted = 0  # Buckets already written to the sidecar
+        self._lock = threading.Lock()
+    
+    def load(self, log_file: Path, parse: Callable[[str], Optional[Tuple[float, str, str]]]) -> None:
+        """Load the sidecar and index any records written after it.
+        
+        The last persisted bucket may have been incomplete, so it is dropped
+        and everything from its offset to the end of the log is re-indexed.
+        
+        Args:
+            log_file: The log file the index describes
+            parse: Returns ``(timestamp, level, searchable text)`` for a log line, or None
+        """
+        by_offset = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        by_offset[record['o']] = [record['t'], record['o'], record['l'], set(record.get('w', ()))]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        
+        log_size = log_file.stat().st_size if log_file.exists() else 0
+        buckets = [b for _, b in sorted(by_offset.items()) if b[1] < log_size]
+        rescan_from = buckets.pop()[1] if buckets else 0
+        
+        with self._lock:
+            self._buckets = buckets
+            self._postings = {}
+            for position, bucket in enumerate(buckets):
+                for term in bucket[3]:
+                    self._postings.setdefault(term, []).append(position)
+            self._persisted = len(buckets)
+            # Rewrite the sidecar so it matches what was kept
+            with open(self.index_path, 'w') as f:
+                for bucket in buckets:
+                    f.write(self._encode(bucket))
+        
+        if log_size > rescan_from:
+            self.index_from(log_file, rescan_from, parse)
+    
+    def index_from(self, log_file: Path, start: int, parse: Callable[[str], Optional[Tuple[float, str, str]]]) -> int:
+        """Index the complete lines of the log from ``start``, e.g. lines another process wrote.
+        
+        Returns:
+            The offset after the last complete line
+        """
+        with open(log_file, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                parsed = parse(raw.decode('utf-8', errors='replace'))
+                if parsed is not None:
+                    self.add(parsed[0], parsed[1], offset, extract_terms(parsed[2]))
+                offset += len(raw)
+        return offset
+    
+    def add(self, timestamp: float, level: str, offset: int, terms: Iterable[str] = ()) -> None:
+        """Count one record written at ``offset`` and index its terms."""
+        start = int(timestamp // BUCKET_SECONDS) * BUCKET_SECONDS
+        with self._lock:
+            # Records that arrive slightly out of order stay in the open bucket
+            if not self._buckets or start > self._buckets[-1][0]:
+                self._buckets.append([start, offset, {}, set()])
+                self._persist_closed()
+            position = len(self._buckets) - 1
+            _, _, counts, bucket_terms = self._buckets[-1]
+            counts[level] = counts.get(level, 0) + 1
+            for term in terms:
+                if term not in bucket_terms:
+                    bucket_terms.add(term)
+                    self._postings.setdefault(term, []).append(position)
+    
+    def flush(self) -> None:
+        """Persist every bucket, including the open one."""
+        with self._lock:
+            if self._buckets:
+                with open(self.index_path, 'a') as f:
+                    for bucket in self._buckets[self._persisted:]:
+                        f.write(self._encode(bucket))
+                self._persisted = len(self._buckets) - 1
+    
+    def reset(self) -> None:
+        """Drop the index, e.g. after the log file is truncated."""
+        with self._lock:
+            self._buckets = []
+            self._postings = {}
+            self._persisted = 0
+            open(self.index_path, 'w').close()
+    
+    @property
+    def start_ts(self) -> Optional[float]:
+        """Start of the oldest bucket, or None if the index is empty"""
+        with self._lock:
+            return self._buckets[0][0] if self._buckets else None
+    
+    def summary(self) -> Dict:
+        """Time range and level counts of everything indexed"""
+        with self._lock:
+            levels = {}
+            for _, _, counts, _ in self._buckets:
+                for level, count in counts.items():
+                    levels[level] = levels.get(level, 0) + count
+            return {
+                'start_ts': self._buckets[0][0] if self._buckets else None,
+                'end_ts': self._buckets[-1][0] + BUCKET_SECONDS if self._buckets else None,
+                'levels': levels,
+                'records': sum(levels.values())
+            }
+    
+    def vocabulary(self) -> Set[str]:
+        """Every term in the index"""
+        with self._lock:
+            return set(self._postings)
+    
+    def regions(self,
+                file_size: int,
+                level: Optional[str] = None,
+                start_ts: Optional[float] = None,
+                end_ts: Optional[float] = None,
+                before: Optional[int] = None,
+                terms: Optional[Set[str]] = None) -> Iterator[Tuple[int, int]]:
+        """Yield ``(start, end)`` byte ranges that may hold matches, newest first.
+        
+        Args:
+            file_size: Current size of the log file
+            level: Only regions with records of this level
+            start_ts: Only regions that may hold records at or after this time
+            end_ts: Only regions that may hold records at or before this time
+            before: Only bytes before this offset (a pagination cursor)
+            terms: Only regions containing all of these terms
+        """
+        with self._lock:
+            buckets = [[b[0], b[1], dict(b[2])] for b in self._buckets]
+            candidates = None
+            if terms:
+                postings = sorted((self._postings.get(term, []) for term in terms), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+        
+        end_offset = file_size if before is None else min(before, file_size)
+        offsets = [b[1] for b in buckets]
+        last = bisect.bisect_left(offsets, end_offset) - 1
+        
+        for i in range(last, -1, -1):
+            bucket_start, offset, counts = buckets[i]
+            region_end = buckets[i + 1][1] if i + 1 < len(buckets) else file_size
+            region_end = min(region_end, end_offset)
+            next_start = buckets[i + 1][0] if i + 1 < len(buckets) else None
+            
+            # Allow one bucket of slack for records written out of order
+            if end_ts is not None and bucket_start - BUCKET_SECONDS > end_ts:
+                continue
+            if start_ts is not None and next_start is not None and next_start <= start_ts:
+                break
+            if level and not counts.get(level):
+                continue
+            if candidates is not None and i not in candidates:
+                continue
+            yield offset, region_end
+    
+    def _persist_closed(self) -> None:
+        """Append closed buckets to the sidecar. Caller holds the lock."""
+        closed = self._buckets[self._persisted:-1]
+        if closed:
+            with open(self.index_path, 'a') as f:
+                for bucket in closed:
+                    f.write(self._encode(bucket))
+            self._persisted += len(closed)
+    
+    @staticmethod
+    def _encode(bucket: list) -> str:
+        return json.dumps(
+            {'t': bucket[0], 'o': bucket[1], 'l': bucket[2], 'w': sorted(bucket[3])},
+            separators=(',', ':')
+        ) + '\n'
+
+class SegmentManifest:
+    """Manifest of closed, compressed log segments.
+    
+    Stored as ``manifest.json`` next to the log. Each segment entry holds
+    its id, file name, time range, level counts, record count and size.
+    ``next_id`` is the id of the segment currently being written.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.next_id = 1
+        self.segments: List[Dict] = []
+        self._lock = threading.Lock()
+        self.reload()
+    
+    def reload(self) -> None:
+        """Read the manifest again, e.g. after another process rotated the log"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            with self._lock:
+                self.next_id = data['next_id']
+                self.segments = data['segments']
+        except (ValueError, KeyError, TypeError):
+            pass
+    
+    def snapshot(self) -> Tuple[int, List[Dict]]:
+        """The active segment id and the closed segments, oldest first"""
+        with self._lock:
+            return self.next_id, list(self.segments)
+    
+    def start_next(self) -> int:
+        """Close the active segment id and return it"""
+        with self._lock:
+            segment_id = self.next_id
+            self.next_id += 1
+            self._save()
+            return segment_id
+    
+    def reserve_ids_through(self, segment_id: int) -> None:
+        """Make sure new segments get ids above an existing segment file's id"""
+        with self._lock:
+            if self.next_id <= segment_id:
+                self.next_id = segment_id + 1
+                self._save()
+    
+    def add(self, segment: Dict) -> None:
+        with self._lock:
+            self.segments.append(segment)
+            self.segments.sort(key=lambda s: s['id'])
+            self._save()
+    
+    def remove(self, segment_ids) -> None:
+        with self._lock:
+            self.segments = [s for s in self.segments if s['id'] not in segment_ids]
+            self._save()
+    
+    def _save(self) -> None:
+        """Write the manifest atomically. Caller holds the lock."""
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'next_id': self.next_id, 'segments': self.segments}, f)
+        os.replace(tmp_path, self.path)
+
+def segment_matches(segment: Dict,
+                    level: Optional[str] = None,
+                    start_ts: Optional[float] = None,
+                    end_ts: Optional[float] = None) -> bool:
+    """Whether a closed segment may hold records matching the filters"""
+    if level and not segment['levels'].get(level):
+        return False
+    # Allow one bucket of slack for records written out of order
+    if start_ts is not None and segment['end_ts'] + BUCKET_SECONDS <= start_ts:
+        return False
+    if end_ts is not None and segment['start_ts'] - BUCKET_SECONDS > end_ts:
+        return False
+    return True
+
+def save_terms(path: Path, terms: Set[str]) -> None:
+    """Write a closed segment's vocabulary as a gzipped JSON list"""
+    tmp_path = path.with_suffix('.tmp')
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(sorted(terms), f)
+    os.replace(tmp_path, path)
+
+def load_terms(path: Path) -> Optional[Set[str]]:
+    """Read a closed segment's vocabulary, or None if it is missing or damaged"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return set(json.load(f))
+    except (OSError, ValueError, EOFError):
+        return None
@@ -3,15 +3,99 @@ Log Manager Utility
 
 This module provides centralized log management functionality for the application.
 It handles log collection, filtering, and persistence.
+
+Log records are written through an indexing file handler that keeps a
+sidecar index of byte offsets per minute and level (see log_index), so
+queries only read the parts of the file that can match their filters.
+The file rotates by size and age into gzip-compressed segments summarised
+in a manifest, and segments past the retention policy are deleted.
+
+Several worker processes may log to the same directory. Each batch is
+written under an exclusive lock on ``app.log.lock``, after indexing any
+lines other processes appended. Rotation and clearing happen under the
+same lock and bump a counter in ``app.log.gen``; a process that sees the
+counter change reopens the file and reloads the manifest and index before
+writing, so no process keeps appending to a file that was rotated away.
+
+Lines are written as text by default, or as one JSON object per line with
+an epoch timestamp, logger, request id and ``extra`` fields when
+LOG_FORMAT=json. Both formats can be read back, even mixed in one file.
+
+The writer also keeps per-level and per-logger counts by minute, hour and
+day (see log_metrics) for dashboards and charts.
+
+Callers never write to the file themselves: records go onto a bounded queue
+and a background writer thread drains it in batches, so logging from the
+request path costs an enqueue rather than a file write under a lock.
 """
 
+import atexit
+import copy
+import gzip
 import logging
+import mmap
+import queue
+import shutil
+import struct
+import threading
+import time
 from datetime import datetime, timedelta
 import json
 import os
-from typing import List, Dict, Optional
+import zlib
+from collections import OrderedDict, deque
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
+from logging.handlers import QueueHandler
+from flask import g, has_request_context
+from .log_index import LogIndex, SegmentManifest, extract_terms, load_terms, save_terms, segment_matches
+from .log_metrics import LogMetrics
+from storage.persistent import InterProcessLock
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Log line format: "text" (the default) or "json", one object per line
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+
+# JsonFormatter always starts a line with these two keys
+JSON_TS_PREFIX = '{"ts":'
+JSON_TS_PREFIX_LEN = len(JSON_TS_PREFIX)
+JSON_LEVEL_PREFIX = ',"level":"'
+JSON_LEVEL_PREFIX_LEN = len(JSON_LEVEL_PREFIX)
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# Bytes read per step when scanning a log file backwards
+READ_BLOCK_SIZE = 64 * 1024
+
+# Rotation and retention of closed log segments
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_ROTATE_SECONDS = int(os.getenv('LOG_ROTATE_SECONDS', '86400'))
+LOG_RETENTION_DAYS = float(os.getenv('LOG_RETENTION_DAYS', '30'))
+LOG_MAX_SEGMENTS = int(os.getenv('LOG_MAX_SEGMENTS', '50'))
+
+# Most bytes a live tail reads per poll
+FOLLOW_READ_SIZE = 1024 * 1024
+
+# Closed segment vocabularies kept in memory for searches
+SEGMENT_TERMS_CACHE_SIZE = 16
+
+# Records waiting for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+# Most records written with a single write call
+WRITE_BATCH_SIZE = 256
+
+# Queue item telling the writer thread to exit
+_STOP = object()
+
+# Rotation epoch shared by every process writing the log, in ``app.log.gen``
+_EPOCH = struct.Struct('<Q')
+
+# Formats tracebacks before records are queued
+_EXCEPTION_FORMATTER = logging.Formatter()
 
 @dataclass
 class LogEntry:
@@ -21,10 +105,492 @@ class LogEntry:
     message: str
     details: Optional[Dict] = None
 
+def parse_log_line(line: str) -> Optional[Tuple[datetime, str, str]]:
+    """Split a text log line into timestamp, level and message, or None if it is not a record"""
+    try:
+        timestamp_str, level_str, message = line.split(' - ', 2)
+        return datetime.strptime(timestamp_str, TIMESTAMP_FORMAT), level_str, message.strip()
+    except ValueError:
+        return None
+
+def parse_json_head(line: str) -> Optional[Tuple[float, str]]:
+    """Read the epoch timestamp and level of a JSON log line without decoding it all.
+    
+    Relies on JsonFormatter writing ``ts`` and ``level`` first.
+    """
+    try:
+        comma = line.index(',', JSON_TS_PREFIX_LEN)
+        level_start = comma + JSON_LEVEL_PREFIX_LEN
+        level_end = line.index('"', level_start)
+        if not line.startswith(JSON_TS_PREFIX) or line[comma:level_start] != JSON_LEVEL_PREFIX:
+            return None
+        return float(line[JSON_TS_PREFIX_LEN:comma]), line[level_start:level_end]
+    except ValueError:
+        return None
+
+def parse_index_fields(line: str) -> Optional[Tuple[float, str, str]]:
+    """Epoch timestamp, level and searchable text of a text or JSON log line, for the index"""
+    if line.startswith('{'):
+        head = parse_json_head(line)
+        if head is None:
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        return head[0], head[1], searchable_text(data.get('msg', ''), data.get('request_id'))
+    parsed = parse_log_line(line)
+    return (parsed[0].timestamp(), parsed[1], parsed[2]) if parsed else None
+
+def searchable_text(message: str, request_id: Optional[str] = None) -> str:
+    """The text of a record that full-text search looks at"""
+    return f"{message} {request_id}" if request_id else message
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line.
+    
+    Keys are ``ts`` (epoch seconds), ``level``, ``logger``, ``msg``,
+    ``request_id`` when set, then any ``extra`` fields passed by the caller.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and key not in data:
+                data[key] = value
+        return json.dumps(data, default=str, separators=(',', ':'))
+
+class RequestContextFilter(logging.Filter):
+    """Adds the current request's id to records logged while handling it"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id') and has_request_context():
+            request_id = g.get('request_id')
+            if request_id:
+                record.request_id = request_id
+        return True
+
+class LineMatcher:
+    """Parses log lines and applies level, date and search filters.
+    
+    Lines are filtered before they are fully parsed: JSON lines by their
+    epoch timestamp and level prefix, text lines by comparing timestamp
+    strings, so only matching lines pay for json.loads or strptime. A
+    search matches lines containing every term of the query.
+    """
+    
+    def __init__(self,
+                 level: Optional[str] = None,
+                 start_date: Optional[datetime] = None,
+                 end_date: Optional[datetime] = None,
+                 query: Optional[str] = None):
+        self.level = level.upper() if level else None
+        self.terms = extract_terms(query) if query else set()
+        self.start_ts = start_date.timestamp() if start_date else None
+        self.end_ts = end_date.timestamp() if end_date else None
+        self.start_str = start_date.strftime(TIMESTAMP_FORMAT) if start_date else None
+        self.end_str = end_date.strftime(TIMESTAMP_FORMAT) if end_date else None
+    
+    def match(self, raw: bytes) -> Optional[LogEntry]:
+        """Return the line as an entry if it is a record that passes the filters"""
+        line = raw.decode('utf-8', errors='replace')
+        if line.startswith('{'):
+            return self._match_json(line)
+        
+        parts = line.split(' - ', 2)
+        if len(parts) < 3:
+            return None
+        timestamp_str, level_str, message = parts
+        if self.level and self.level != level_str:
+            return None
+        if self.start_str and timestamp_str < self.start_str:
+            return None
+        if self.end_str and timestamp_str > self.end_str:
+            return None
+        if self.terms and not self.terms <= extract_terms(message):
+            return None
+        try:
+            timestamp = datetime.strptime(timestamp_str, TIMESTAMP_FORMAT)
+        except ValueError:
+            return None
+        return LogEntry(timestamp=timestamp, level=level_str, message=message.strip())
+    
+    def _match_json(self, line: str) -> Optional[LogEntry]:
+        head = parse_json_head(line)
+        if head is None:
+            return None
+        ts, level_str = head
+        if self.level and self.level != level_str:
+            return None
+        if self.start_ts is not None and ts < self.start_ts:
+            return None
+        if self.end_ts is not None and ts > self.end_ts:
+            return None
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        message = data.pop('msg', '')
+        if self.terms and not self.terms <= extract_terms(searchable_text(message, data.get('request_id'))):
+            return None
+        for key in ('ts', 'level'):
+            data.pop(key, None)
+        return LogEntry(
+            timestamp=datetime.fromtimestamp(ts),
+            level=level_str,
+            message=message,
+            details=data or None
+        )
+
+def iter_lines_reverse(f, start: int, end: int, block_size: int = READ_BLOCK_SIZE):
+    """Yield ``(offset, line)`` for the lines of ``f[start:end]``, last line first.
+    
+    The file is read in blocks backwards from ``end``, so the cost depends
+    on how many lines the caller consumes rather than on the region size.
+    
+    Args:
+        f: Log file opened in binary mode
+        start: Offset of the first line of the region
+        end: Offset just past the last line of the region
+        block_size: Bytes read per step
+    """
+    pos = end
+    tail = b''
+    while pos > start:
+        read_size = min(block_size, pos - start)
+        pos -= read_size
+        f.seek(pos)
+        block = f.read(read_size) + tail
+        
+        # Text before the first newline may continue in the previous block
+        cut = block.find(b'\n') + 1 if pos > start else 0
+        if pos > start and cut == 0:
+            tail = block
+            continue
+        tail, body = block[:cut], block[cut:]
+        
+        line_end = len(body)
+        while line_end > 0:
+            line_start = body.rfind(b'\n', 0, line_end - 1) + 1
+            yield pos + cut + line_start, body[line_start:line_end]
+            line_end = line_start
+
+class IndexedFileHandler(logging.FileHandler):
+    """File handler that indexes what it writes and rotates into compressed segments.
+    
+    Each record's offset is recorded in a LogIndex. When the file reaches
+    ``max_bytes`` or its oldest record is ``rotate_seconds`` old, it is
+    closed, gzip-compressed to ``app.<id>.log.gz`` and summarised in the
+    segment manifest. Segments beyond the retention policy are deleted.
+    
+    Writes, rotation and truncation run under an inter-process lock, and
+    every rotation or truncation bumps a shared epoch counter so other
+    processes reopen the file and reload their state before writing.
+    """
+    
+    def __init__(self,
+                 filename: Path,
+                 index: LogIndex,
+                 manifest: SegmentManifest,
+                 max_bytes: int = LOG_MAX_BYTES,
+                 rotate_seconds: int = LOG_ROTATE_SECONDS,
+                 retention_days: float = LOG_RETENTION_DAYS,
+                 max_segments: int = LOG_MAX_SEGMENTS):
+        # Opened on first write, under the inter-process lock
+        super().__init__(filename, encoding='utf-8', delay=True)
+        self.index = index
+        self.manifest = manifest
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.retention_days = retention_days
+        self.max_segments = max_segments
+        self.log_dir = Path(filename).parent
+        self._interprocess_lock = InterProcessLock(str(self.log_dir / 'app.log.lock'))
+        epoch_path = self.log_dir / 'app.log.gen'
+        with self._interprocess_lock:
+            with open(epoch_path, 'ab') as f:
+                if f.tell() < _EPOCH.size:
+                    f.write(bytes(_EPOCH.size - f.tell()))
+            with open(epoch_path, 'r+b') as f:
+                self._epoch_map = mmap.mmap(f.fileno(), _EPOCH.size)
+            self._seen_epoch = self._epoch()
+            self.manifest.reload()
+            self.index.load(Path(filename), parse_index_fields)
+            self._recover_segments()
+            self._indexed_to = self._file_size()
+    
+    def _epoch(self) -> int:
+        """The shared counter bumped whenever any process rotates or truncates the file"""
+        return _EPOCH.unpack_from(self._epoch_map)[0]
+    
+    def _bump_epoch(self) -> None:
+        """Record a rotation or truncation. Caller holds the inter-process lock."""
+        self._seen_epoch = self._epoch() + 1
+        _EPOCH.pack_into(self._epoch_map, 0, self._seen_epoch)
+    
+    def _file_size(self) -> int:
+        try:
+            return os.stat(self.baseFilename).st_size
+        except FileNotFoundError:
+            return 0
+    
+    def _catch_up(self) -> None:
+        """Pick up what other processes did since this one last wrote.
+        
+        Caller holds the handler lock and the inter-process lock.
+        """
+        if self._epoch() != self._seen_epoch:
+            # Rotated or truncated elsewhere: our stream may point at a file that moved
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self.manifest.reload()
+            self.index.load(Path(self.baseFilename), parse_index_fields)
+            self._indexed_to = self._file_size()
+            self._seen_epoch = self._epoch()
+        elif self._file_size() > self._indexed_to:
+            self._indexed_to = self.index.index_from(Path(self.baseFilename), self._indexed_to, parse_index_fields)
+    
+    def refresh(self) -> None:
+        """Index records other processes wrote, before a query reads the index"""
+        if self._epoch() == self._seen_epoch and self._file_size() <= self._indexed_to:
+            return
+        self.acquire()
+        try:
+            with self._interprocess_lock:
+                self._catch_up()
+        finally:
+            self.release()
+    
+    def segment_path(self, segment_id: int, compressed: bool = True) -> Path:
+        return self.log_dir / f"app.{segment_id:06d}.log{'.gz' if compressed else ''}"
+    
+    def terms_path(self, segment_id: int) -> Path:
+        return self.log_dir / f"app.{segment_id:06d}.terms.gz"
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        self.emit_batch([record])
+    
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        """Write several records with a single write and flush"""
+        self.acquire()
+        try:
+            with self._interprocess_lock:
+                self._write_batch(records)
+        except Exception:
+            self.handleError(records[-1])
+        finally:
+            self.release()
+    
+    def _write_batch(self, records: List[logging.LogRecord]) -> None:
+        """Write and index a batch. Caller holds the handler lock and the inter-process lock."""
+        self._catch_up()
+        if self.stream is None:
+            self.stream = self._open()
+        # Every writer flushes under the lock, so the size is our offset
+        offset = os.fstat(self.stream.fileno()).st_size
+        if self._should_rotate(offset):
+            self._rotate()
+            offset = 0
+        
+        lines = []
+        written = []
+        for record in records:
+            if record.levelno < self.level:
+                continue
+            try:
+                line = self.format(record) + self.terminator
+            except Exception:
+                self.handleError(record)
+                continue
+            lines.append(line)
+            written.append((record, offset))
+            offset += len(line.encode('utf-8'))
+        
+        self.stream.write(''.join(lines))
+        self.flush()
+        self._indexed_to = offset
+        for record, record_offset in written:
+            terms = extract_terms(searchable_text(record.getMessage(), getattr(record, 'request_id', None)))
+            self.index.add(record.created, record.levelname, record_offset, terms)
+    
+    def _should_rotate(self, size: int) -> bool:
+        if size == 0:
+            return False
+        if self.max_bytes and size >= self.max_bytes:
+            return True
+        start_ts = self.index.start_ts
+        return bool(self.rotate_seconds) and start_ts is not None and time.time() - start_ts >= self.rotate_seconds
+    
+    def _rotate(self) -> None:
+        """Close the active file as a segment and start a new one. Caller holds the lock."""
+        summary = self.index.summary()
+        terms = self.index.vocabulary()
+        segment_id = self.manifest.start_next()
+        
+        # Move the file aside first so a crash never leaves records in two places
+        self.stream.close()
+        os.replace(self.baseFilename, self.segment_path(segment_id, compressed=False))
+        self.index.reset()
+        self.stream = self._open()
+        
+        self._seal_segment(segment_id, summary, terms)
+        self._apply_retention()
+        self._indexed_to = 0
+        self._bump_epoch()
+    
+    def _seal_segment(self, segment_id: int, summary: Dict, terms: Set[str]) -> None:
+        """Compress a closed segment, save its vocabulary and add it to the manifest"""
+        plain_path = self.segment_path(segment_id, compressed=False)
+        gz_path = self.segment_path(segment_id)
+        tmp_path = gz_path.with_suffix('.tmp')
+        with open(plain_path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, READ_BLOCK_SIZE)
+        os.replace(tmp_path, gz_path)
+        save_terms(self.terms_path(segment_id), terms)
+        
+        self.manifest.add({
+            'id': segment_id,
+            'file': gz_path.name,
+            'start_ts': summary['start_ts'],
+            'end_ts': summary['end_ts'],
+            'levels': summary['levels'],
+            'records': summary['records'],
+            'bytes': gz_path.stat().st_size
+        })
+        plain_path.unlink()
+    
+    def _recover_segments(self) -> None:
+        """Finish sealing segments left uncompressed by an interrupted rotation"""
+        _, segments = self.manifest.snapshot()
+        sealed = {segment['id'] for segment in segments}
+        for path in self.log_dir.glob('app.*.log*'):
+            try:
+                self.manifest.reserve_ids_through(int(path.name.split('.')[1]))
+            except ValueError:
+                continue
+        
+        for plain_path in sorted(self.log_dir.glob('app.*.log')):
+            try:
+                segment_id = int(plain_path.name.split('.')[1])
+            except ValueError:
+                continue
+            if segment_id in sealed:
+                plain_path.unlink()
+                continue
+            index = LogIndex(plain_path.with_name(plain_path.name + '.idx'))
+            index.load(plain_path, parse_index_fields)
+            summary = index.summary()
+            terms = index.vocabulary()
+            index.index_path.unlink()
+            if summary['records']:
+                self._seal_segment(segment_id, summary, terms)
+            else:
+                plain_path.unlink()
+    
+    def _apply_retention(self) -> None:
+        """Delete segments that are too old or beyond the segment limit"""
+        _, segments = self.manifest.snapshot()
+        expired = set()
+        if self.retention_days:
+            cutoff = time.time() - self.retention_days * 86400
+            expired.update(s['id'] for s in segments if s['end_ts'] < cutoff)
+        if self.max_segments:
+            expired.update(s['id'] for s in segments[:max(0, len(segments) - self.max_segments)])
+        if expired:
+            self.manifest.remove(expired)
+            for segment_id in expired:
+                self.segment_path(segment_id).unlink(missing_ok=True)
+                self.terms_path(segment_id).unlink(missing_ok=True)
+    
+    def truncate(self) -> None:
+        """Empty the log file and its index and delete every closed segment"""
+        self.acquire()
+        try:
+            with self._interprocess_lock:
+                self._catch_up()
+                if self.stream is not None:
+                    self.stream.close()
+                self.stream = open(self.baseFilename, 'w', encoding='utf-8')
+                self.index.reset()
+                self._indexed_to = 0
+                
+                # Bump the segment id so cursors into the old file stop matching
+                self.manifest.start_next()
+                _, segments = self.manifest.snapshot()
+                self.manifest.remove({segment['id'] for segment in segments})
+                for segment in segments:
+                    (self.log_dir / segment['file']).unlink(missing_ok=True)
+                    self.terms_path(segment['id']).unlink(missing_ok=True)
+                self._bump_epoch()
+        finally:
+            self.release()
+    
+    def close(self) -> None:
+        self.acquire()
+        try:
+            with self._interprocess_lock:
+                # After another process rotated, this index describes a file that moved away
+                if self._epoch() == self._seen_epoch:
+                    self.index.flush()
+        finally:
+            self.release()
+        super().close()
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops and counts records instead of blocking when full"""
+    
+    def __init__(self, manager: 'LogManager'):
+        super().__init__(None)
+        self.manager = manager
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        records = self.manager._ensure_writer()
+        if records is None:
+            # Shutting down: write directly so late records are not lost
+            self.manager.handler.handle(record)
+            return
+        try:
+            records.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message and traceback text so the record can cross threads.
+        
+        Unlike ``QueueHandler.prepare`` the traceback is kept in ``exc_text``
+        rather than folded into the message, so the file formatter decides
+        where it goes (the ``exc`` key in JSON lines).
+        """
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
 class LogManager:
     """Manages application logging and log retrieval"""
     
-    def __init__(self, log_dir: str = "logs"):
+    def __init__(self,
+                 log_dir: str = "logs",
+                 max_bytes: int = LOG_MAX_BYTES,
+                 rotate_seconds: int = LOG_ROTATE_SECONDS,
+                 retention_days: float = LOG_RETENTION_DAYS,
+                 max_segments: int = LOG_MAX_SEGMENTS,
+                 log_format: str = LOG_FORMAT):
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
         
@@ -32,62 +598,429 @@ class LogManager:
         self.logger = logging.getLogger('app')
         self.logger.setLevel(logging.INFO)
         
-        # File handler for all logs
-        log_file = self.log_dir / "app.log"
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.INFO)
-        formatter = logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
+        # File handler for all logs, indexed by minute and level and rotated into segments
+        self.log_file = self.log_dir / "app.log"
+        self.handler = IndexedFileHandler(
+            self.log_file,
+            LogIndex(self.log_dir / "app.log.idx"),
+            SegmentManifest(self.log_dir / "manifest.json"),
+            max_bytes=max_bytes,
+            rotate_seconds=rotate_seconds,
+            retention_days=retention_days,
+            max_segments=max_segments
         )
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        self.handler.setLevel(logging.INFO)
+        if log_format == 'json':
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(
+                '%(asctime)s - %(levelname)s - %(message)s',
+                datefmt=TIMESTAMP_FORMAT
+            )
+        self.handler.setFormatter(formatter)
+        self._segment_terms = OrderedDict()
+        
+        # Pre-aggregated counts per level and logger for dashboards
+        self.metrics = LogMetrics(self.log_dir / "metrics.json")
+        
+        # Callers only enqueue; a writer thread per process does the I/O
+        self._queue = None
+        self._writer = None
+        self._writer_pid = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        self.records_written = 0
+        self.batches_written = 0
+        self.write_errors = 0
+        self.queue_handler = DroppingQueueHandler(self)
+        self.queue_handler.setLevel(logging.INFO)
+        self.queue_handler.addFilter(RequestContextFilter())
+        self.logger.addHandler(self.queue_handler)
+        atexit.register(self.shutdown)
+    
+    def _ensure_writer(self) -> Optional[queue.Queue]:
+        """Return the record queue, starting the writer thread once per process"""
+        if self._closed:
+            return None
+        pid = os.getpid()
+        if self._writer_pid == pid:
+            return self._queue
+        with self._writer_lock:
+            if self._writer_pid != pid:
+                self._queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+                self._writer = threading.Thread(
+                    target=self._write_loop,
+                    args=(self._queue,),
+                    name='log-writer',
+                    daemon=True
+                )
+                self._writer.start()
+                self._writer_pid = pid
+        return self._queue
+    
+    def _write_loop(self, records: queue.Queue) -> None:
+        """Drain the queue, writing whatever is waiting as one batch"""
+        while True:
+            item = records.get()
+            batch = []
+            waiters = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if len(batch) >= WRITE_BATCH_SIZE:
+                    break
+                try:
+                    item = records.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if batch:
+                try:
+                    self.handler.emit_batch(batch)
+                    self.metrics.add_records(record for record in batch if record.levelno >= self.handler.level)
+                    self.records_written += len(batch)
+                    self.batches_written += 1
+                except Exception:
+                    # Report and carry on; a dead writer would drop every later record
+                    self.write_errors += 1
+                    self.handler.handleError(batch[-1])
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+    
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait until records queued so far have been written.
+        
+        Returns:
+            False if the writer did not catch up within the timeout
+        """
+        if self._closed or self._writer_pid != os.getpid():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+    
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Write out queued records and stop the writer thread"""
+        if self._closed:
+            return
+        # Records logged from now on are written directly
+        self._closed = True
+        if self._writer_pid == os.getpid():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+                self._writer.join(timeout)
+            except queue.Full:
+                pass
+        self.handler.close()
+        self.metrics.save()
+    
+    def writer_stats(self) -> Dict:
+        """Counts of queued, written and dropped records and failed batches for this process"""
+        return {
+            'queued': self._queue.qsize() if self._writer_pid == os.getpid() else 0,
+            'written': self.records_written,
+            'batches': self.batches_written,
+            'dropped': self.queue_handler.dropped,
+            'errors': self.write_errors,
+            'metrics_save_errors': self.metrics.save_errors
+        }
     
     def get_logs(self, 
                 level: Optional[str] = None, 
                 start_date: Optional[datetime] = None,
                 end_date: Optional[datetime] = None,
-                limit: int = 100) -> List[LogEntry]:
-        """Retrieve logs with optional filtering"""
+                limit: int = 100,
+                query: Optional[str] = None) -> List[LogEntry]:
+        """Retrieve logs with optional filtering, most recent first"""
+        return self.get_logs_page(level, start_date, end_date, limit, query=query)[0]
+    
+    def get_logs_page(self,
+                      level: Optional[str] = None,
+                      start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None,
+                      limit: int = 100,
+                      cursor: Optional[str] = None,
+                      query: Optional[str] = None) -> Tuple[List[LogEntry], Optional[str]]:
+        """Retrieve one page of logs, most recent first.
+        
+        Only the index regions that can match the filters are read, backwards
+        from their end, and reading stops as soon as the page is full. Closed
+        segments whose manifest entry or vocabulary rules out a match are
+        skipped.
+        
+        Args:
+            level: Only entries of this level
+            start_date: Only entries at or after this time
+            end_date: Only entries at or before this time
+            limit: Maximum entries to return
+            cursor: ``segment:offset`` cursor from a previous page to continue from
+            query: Only entries containing every term of this search text
+        
+        Returns:
+            The entries and a cursor for the next page, or None if this is the last page
+        """
+        self.flush()
+        self.handler.refresh()
         logs = []
-        log_file = self.log_dir / "app.log"
+        matcher = LineMatcher(level, start_date, end_date, query)
+        for position, entry in self._iter_newest(matcher, cursor, limit):
+            logs.append(entry)
+            if len(logs) >= limit:
+                return logs, position
+        return logs, None
+    
+    def iter_export(self,
+                    level: Optional[str] = None,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None,
+                    query: Optional[str] = None,
+                    compress: bool = False,
+                    chunk_size: int = READ_BLOCK_SIZE) -> Iterator[bytes]:
+        """Stream matching logs, oldest first, as newline-delimited JSON.
         
-        if not log_file.exists():
-            return []
+        Matching regions are read forward line by line and output is yielded
+        in chunks, so memory use does not grow with the size of the export.
         
-        with open(log_file, 'r') as f:
-            for line in f:
-                try:
-                    # Parse log line
-                    timestamp_str, level_str, message = line.split(' - ', 2)
-                    timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
+        Args:
+            level: Only entries of this level
+            start_date: Only entries at or after this time
+            end_date: Only entries at or before this time
+            query: Only entries containing every term of this search text
+            compress: Gzip the output on the fly
+            chunk_size: Approximate bytes per yielded chunk
+        """
+        self.flush()
+        self.handler.refresh()
+        compressor = zlib.compressobj(wbits=31) if compress else None
+        buffer = []
+        buffered = 0
+        for entry in self._iter_oldest(LineMatcher(level, start_date, end_date, query)):
+            line = (json.dumps(asdict(entry), default=str) + '\n').encode('utf-8')
+            buffer.append(line)
+            buffered += len(line)
+            if buffered >= chunk_size:
+                chunk = b''.join(buffer)
+                buffer, buffered = [], 0
+                chunk = compressor.compress(chunk) if compressor else chunk
+                if chunk:
+                    yield chunk
+        
+        chunk = b''.join(buffer)
+        if compressor:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            yield chunk
+    
+    def _iter_newest(self,
+                     matcher: LineMatcher,
+                     cursor: Optional[str],
+                     limit: int) -> Iterator[Tuple[str, LogEntry]]:
+        """Yield ``(cursor, entry)`` for matching logs across all segments, newest first"""
+        active_id, segments = self.handler.manifest.snapshot()
+        cursor_segment, before = self._parse_cursor(cursor, active_id)
+        
+        if cursor_segment == active_id and self.log_file.exists():
+            with open(self.log_file, 'rb') as f:
+                regions = self.handler.index.regions(
+                    os.fstat(f.fileno()).st_size,
+                    level=matcher.level,
+                    start_ts=matcher.start_ts,
+                    end_ts=matcher.end_ts,
+                    before=before,
+                    terms=matcher.terms
+                )
+                for region_start, region_end in regions:
+                    for offset, raw in iter_lines_reverse(f, region_start, region_end):
+                        entry = matcher.match(raw)
+                        if entry is not None:
+                            yield f"{active_id}:{offset}", entry
+        
+        for segment in reversed(segments):
+            if segment['id'] > cursor_segment or not self._segment_may_match(segment, matcher):
+                continue
+            # Compressed segments can only be read forward, so keep the newest matches
+            segment_before = before if segment['id'] == cursor_segment else None
+            matches = deque(maxlen=limit)
+            for offset, raw in self._iter_segment_lines(segment):
+                if segment_before is not None and offset >= segment_before:
+                    break
+                entry = matcher.match(raw)
+                if entry is not None:
+                    matches.append((offset, entry))
+            for offset, entry in reversed(matches):
+                yield f"{segment['id']}:{offset}", entry
+    
+    def _iter_oldest(self, matcher: LineMatcher) -> Iterator[LogEntry]:
+        """Yield matching logs across all segments, oldest first"""
+        _, segments = self.handler.manifest.snapshot()
+        
+        for segment in segments:
+            if not self._segment_may_match(segment, matcher):
+                continue
+            for _, raw in self._iter_segment_lines(segment):
+                entry = matcher.match(raw)
+                if entry is not None:
+                    yield entry
+        
+        if not self.log_file.exists():
+            return
+        with open(self.log_file, 'rb') as f:
+            regions = list(self.handler.index.regions(
+                os.fstat(f.fileno()).st_size,
+                level=matcher.level,
+                start_ts=matcher.start_ts,
+                end_ts=matcher.end_ts,
+                terms=matcher.terms
+            ))
+            for region_start, region_end in reversed(regions):
+                f.seek(region_start)
+                position = region_start
+                while position < region_end:
+                    raw = f.readline()
+                    if not raw:
+                        break
+                    position += len(raw)
+                    entry = matcher.match(raw)
+                    if entry is not None:
+                        yield entry
+    
+    def follow(self,
+               level: Optional[str] = None,
+               query: Optional[str] = None,
+               poll_interval: float = 1.0,
+               heartbeat: float = 15.0) -> Iterator[Optional[LogEntry]]:
+        """Yield log entries as they are written, starting from the end of the log.
+        
+        The file is polled from a remembered byte offset, so each poll only
+        reads what was appended since the last one. When the log rotates the
+        rest of the old file is read before switching to the new one, and a
+        truncated file is followed from its start. Until the log file exists
+        (it is created on the first write) only heartbeats are yielded.
+        
+        Args:
+            level: Only entries of this level
+            query: Only entries containing every term of this search text
+            poll_interval: Seconds to wait when there is nothing new
+            heartbeat: Yield None after this many idle seconds so callers
+                can keep the connection alive
+        """
+        matcher = LineMatcher(level, query=query)
+        f = self._open_log()
+        if f is not None:
+            f.seek(0, os.SEEK_END)
+        partial = b''
+        idle_since = time.monotonic()
+        try:
+            while True:
+                data = f.read(FOLLOW_READ_SIZE) if f is not None else b''
+                if not data:
+                    try:
+                        current = os.stat(self.log_file)
+                    except FileNotFoundError:
+                        current = None
                     
-                    # Apply filters
-                    if level and level.upper() != level_str:
+                    if f is None and current is not None:
+                        # Created since the last poll: follow it from its start
+                        f = self._open_log()
+                        partial = b''
                         continue
-                    if start_date and timestamp < start_date:
+                    elif f is not None and current is None:
+                        # Rotated away and not created again yet: take what is left and wait for it
+                        data = f.read()
+                        f.close()
+                        f = None
+                    elif f is not None and current.st_ino != os.fstat(f.fileno()).st_ino:
+                        # Rotated: take anything written just before the rename, then follow the new file
+                        data = f.read()
+                        f.close()
+                        f = self._open_log()
+                    elif f is not None and current.st_size < f.tell():
+                        # Truncated by clear_logs
+                        f.seek(0)
+                        partial = b''
                         continue
-                    if end_date and timestamp > end_date:
+                    else:
+                        if time.monotonic() - idle_since >= heartbeat:
+                            idle_since = time.monotonic()
+                            yield None
+                        time.sleep(poll_interval)
                         continue
-                    
-                    logs.append(LogEntry(
-                        timestamp=timestamp,
-                        level=level_str,
-                        message=message.strip()
-                    ))
-                except Exception:
-                    continue
+                
+                lines = (partial + data).split(b'\n')
+                partial = lines.pop()
+                for raw in lines:
+                    entry = matcher.match(raw)
+                    if entry is not None:
+                        idle_since = time.monotonic()
+                        yield entry
+        finally:
+            if f is not None:
+                f.close()
+    
+    def _open_log(self) -> Optional[BinaryIO]:
+        """Open the active log for reading, or return None while it does not exist.
+        
+        The handler creates the file on its first write, so a worker that
+        has not logged anything yet has no file to follow.
+        """
+        try:
+            return open(self.log_file, 'rb')
+        except FileNotFoundError:
+            return None
+    
+    def _segment_may_match(self, segment: Dict, matcher: LineMatcher) -> bool:
+        """Check a closed segment's manifest entry and vocabulary against the filters"""
+        if not segment_matches(segment, matcher.level, matcher.start_ts, matcher.end_ts):
+            return False
+        if not matcher.terms:
+            return True
         
-        # Return most recent logs first
-        return sorted(logs, key=lambda x: x.timestamp, reverse=True)[:limit]
+        terms = self._segment_terms.get(segment['id'])
+        if terms is None:
+            terms = load_terms(self.handler.terms_path(segment['id']))
+            if terms is None:
+                # No vocabulary saved for this segment, so it has to be read
+                return True
+            self._segment_terms[segment['id']] = terms
+            while len(self._segment_terms) > SEGMENT_TERMS_CACHE_SIZE:
+                self._segment_terms.popitem(last=False)
+        return matcher.terms <= terms
+    
+    def _iter_segment_lines(self, segment: Dict) -> Iterator[Tuple[int, bytes]]:
+        """Yield ``(offset, line)`` for a closed segment, decompressing as it goes"""
+        try:
+            with gzip.open(self.log_dir / segment['file'], 'rb') as f:
+                offset = 0
+                for raw in f:
+                    yield offset, raw
+                    offset += len(raw)
+        except (FileNotFoundError, EOFError, gzip.BadGzipFile):
+            # Removed by retention while reading, or damaged
+            return
+    
+    @staticmethod
+    def _parse_cursor(cursor: Optional[str], active_id: int) -> Tuple[int, Optional[int]]:
+        """Split a ``segment:offset`` cursor; anything else starts from the newest entry"""
+        try:
+            segment_id, offset = cursor.split(':')
+            return int(segment_id), int(offset)
+        except (AttributeError, ValueError):
+            return active_id, None
     
     def clear_logs(self) -> bool:
         """Clear all logs"""
         try:
-            log_file = self.log_dir / "app.log"
-            if log_file.exists():
-                log_file.unlink()
-                log_file.touch()
+            self.handler.truncate()
             return True
         except Exception:
             return False
@@ -0,0 +1,273 @@
+"""
+Log Metrics Utility
+
+This module keeps pre-aggregated counts of log records per level and per
+logger, in per-minute buckets rolled up to hours and days. Counts are
+updated by the log writer as records are written, so dashboards and charts
+read a few small dictionaries instead of scanning log files. The counters
+are saved to a JSON file by a background thread once a minute and at
+shutdown, and reloaded on start. Saving never runs on the log writer
+thread, and a failed save is reported and retried rather than raised.
+
+Several worker processes can share one log directory. Each keeps the
+counts it added since its last save apart and adds them to the file under
+an inter-process lock, so the file holds every worker's records; readers
+reload the file when another worker has saved.
+
+Dependencies:
+    - json: For persisting the counters
+    - threading: For thread-safe access between the writer and readers
+    - storage.persistent: For the inter-process file lock
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from storage.persistent import InterProcessLock
+
+# Bucket width and how many buckets are kept for each resolution
+RESOLUTIONS = {
+    'minute': (60, 2 * 24 * 60),
+    'hour': (3600, 90 * 24),
+    'day': (86400, 2 * 365)
+}
+
+# Seconds between saves of the counters file
+SAVE_INTERVAL = 60
+
+class LogMetrics:
+    """Per-level and per-logger record counts at minute, hour and day resolution.
+    
+    Each resolution maps a bucket start (epoch seconds) to
+    ``{'levels': {level: count}, 'loggers': {name: count}}``. ``_buckets``
+    holds the saved counts of every process plus this process's unsaved
+    counts, which are also kept in ``_pending`` until they are saved.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._buckets: Dict[str, Dict[int, Dict]] = {name: {} for name in RESOLUTIONS}
+        self._pending: Dict[str, Dict[int, Dict]] = {name: {} for name in RESOLUTIONS}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._interprocess_lock = InterProcessLock(str(self.path.with_suffix('.lock')))
+        self._saved_version: Optional[Tuple] = None
+        self._saver_lock = threading.Lock()
+        self._saver_pid: Optional[int] = None
+        self.save_errors = 0
+        with self._save_lock:
+            self._refresh()
+    
+    def add_records(self, records: Iterable) -> None:
+        """Count written log records (anything with created, levelname and name)."""
+        with self._lock:
+            for record in records:
+                counts = {'levels': {record.levelname: 1}, 'loggers': {record.name: 1}}
+                for name, (width, _) in RESOLUTIONS.items():
+                    start = int(record.created // width) * width
+                    self._add(self._buckets, name, start, counts)
+                    self._add(self._pending, name, start, counts)
+        self._ensure_saver()
+    
+    def series(self,
+               resolution: str = 'hour',
+               since: Optional[float] = None,
+               until: Optional[float] = None,
+               by: str = 'level') -> Dict:
+        """Zero-filled time series of counts for charts.
+        
+        Args:
+            resolution: ``minute``, ``hour`` or ``day``
+            since: Start of the range in epoch seconds; defaults to 60 buckets ago
+            until: End of the range in epoch seconds; defaults to now
+            by: Group counts by ``level`` or ``logger``
+        
+        Returns:
+            Bucket width, bucket start timestamps and one list of counts per
+            level or logger, aligned with the timestamps
+        
+        Raises:
+            ValueError: If the resolution or grouping is not supported
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Invalid resolution: {resolution}")
+        if by not in ('level', 'logger'):
+            raise ValueError(f"Invalid grouping: {by}")
+        width, keep = RESOLUTIONS[resolution]
+        until = time.time() if until is None else until
+        since = until - 59 * width if since is None else since
+        first = int(since // width) * width
+        last = int(until // width) * width
+        # Never return more buckets than are kept
+        first = max(first, last - (keep - 1) * width)
+        timestamps = list(range(first, last + 1, width))
+        
+        key = 'levels' if by == 'level' else 'loggers'
+        series: Dict[str, List[int]] = {}
+        self.refresh()
+        with self._lock:
+            buckets = self._buckets[resolution]
+            for i, start in enumerate(timestamps):
+                bucket = buckets.get(start)
+                if bucket is None:
+                    continue
+                for name, count in bucket[key].items():
+                    series.setdefault(name, [0] * len(timestamps))[i] = count
+        
+        return {
+            'resolution': resolution,
+            'bucket_seconds': width,
+            'timestamps': timestamps,
+            'series': series
+        }
+    
+    def total(self, resolution: str, since: float, until: Optional[float] = None) -> Dict[str, int]:
+        """Counts per level for buckets starting in ``[since, until]``."""
+        until = time.time() if until is None else until
+        totals: Dict[str, int] = {}
+        self.refresh()
+        with self._lock:
+            for start, bucket in self._buckets[resolution].items():
+                if since <= start <= until:
+                    for level, count in bucket['levels'].items():
+                        totals[level] = totals.get(level, 0) + count
+        return totals
+    
+    def recent(self, resolution: str = 'hour', limit: int = 10) -> List[Dict]:
+        """The most recent non-empty buckets, newest first, with their level counts."""
+        self.refresh()
+        with self._lock:
+            starts = sorted(self._buckets[resolution], reverse=True)[:limit]
+            return [
+                {'start': start, 'levels': dict(self._buckets[resolution][start]['levels'])}
+                for start in starts
+            ]
+    
+    def save(self) -> bool:
+        """Add the counts recorded since the last save to the counters file.
+        
+        The file is read, merged and replaced under an inter-process lock,
+        so saves from several workers sharing the file add up.
+        
+        Returns:
+            False if the file could not be written; the counts stay
+            unsaved and are written by the next save
+        """
+        with self._save_lock:
+            with self._lock:
+                if not any(self._pending.values()):
+                    return True
+                pending = self._pending
+                self._pending = {name: {} for name in RESOLUTIONS}
+            
+            tmp_path = self.path.with_suffix('.tmp')
+            try:
+                with self._interprocess_lock:
+                    saved = self._read_file()
+                    for name, buckets in pending.items():
+                        for start, counts in buckets.items():
+                            self._add(saved, name, start, counts)
+                    with open(tmp_path, 'w') as f:
+                        json.dump({
+                            name: {str(start): bucket for start, bucket in buckets.items()}
+                            for name, buckets in saved.items()
+                        }, f, separators=(',', ':'))
+                    os.replace(tmp_path, self.path)
+                    version = self._file_version()
+            except OSError as e:
+                with self._lock:
+                    for name, buckets in pending.items():
+                        for start, counts in buckets.items():
+                            self._add(self._pending, name, start, counts)
+                    self.save_errors += 1
+                print(f"Warning: could not save log metrics to {self.path}: {e}", file=sys.stderr)
+                return False
+            
+            self._use_saved(saved, version)
+            return True
+    
+    def refresh(self) -> None:
+        """Reload the counters file if another process saved since it was last read."""
+        if self._file_version() == self._saved_version:
+            return
+        with self._save_lock:
+            self._refresh()
+    
+    def _ensure_saver(self) -> None:
+        """Start the thread that saves the counters, once per process."""
+        pid = os.getpid()
+        if self._saver_pid == pid:
+            return
+        with self._saver_lock:
+            if self._saver_pid != pid:
+                threading.Thread(target=self._save_loop, name='log-metrics-saver', daemon=True).start()
+                self._saver_pid = pid
+    
+    def _save_loop(self) -> None:
+        while True:
+            time.sleep(SAVE_INTERVAL)
+            self.save()
+    
+    def _refresh(self) -> None:
+        """Read the counters file into ``_buckets``. Caller holds ``_save_lock``."""
+        version = self._file_version()
+        if version != self._saved_version:
+            self._use_saved(self._read_file(), version)
+    
+    def _use_saved(self, saved: Dict[str, Dict[int, Dict]], version: Optional[Tuple]) -> None:
+        """Make saved counts plus the unsaved ones the counts readers see."""
+        with self._lock:
+            for name, buckets in self._pending.items():
+                for start, counts in buckets.items():
+                    self._add(saved, name, start, counts)
+            self._buckets = saved
+            self._saved_version = version
+    
+    def _file_version(self) -> Optional[Tuple]:
+        """Identify the current counters file; every save replaces it with a new one."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def _read_file(self) -> Dict[str, Dict[int, Dict]]:
+        buckets: Dict[str, Dict[int, Dict]] = {name: {} for name in RESOLUTIONS}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            for name in RESOLUTIONS:
+                buckets[name] = {int(start): bucket for start, bucket in data.get(name, {}).items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError, AttributeError):
+            # Damaged counters only lose history; logging carries on
+            buckets = {name: {} for name in RESOLUTIONS}
+        return buckets
+    
+    @staticmethod
+    def _add(target: Dict[str, Dict[int, Dict]], resolution: str, start: int, counts: Dict) -> None:
+        """Add one bucket's counts into ``target``, dropping buckets past retention."""
+        buckets = target[resolution]
+        bucket = buckets.get(start)
+        if bucket is None:
+            bucket = buckets[start] = {'levels': {}, 'loggers': {}}
+            LogMetrics._prune(buckets, resolution, start)
+        for key in ('levels', 'loggers'):
+            totals = bucket[key]
+            for name, count in counts[key].items():
+                totals[name] = totals.get(name, 0) + count
+    
+    @staticmethod
+    def _prune(buckets: Dict[int, Dict], resolution: str, newest: int) -> None:
+        """Drop buckets older than the retention of a resolution."""
+        width, keep = RESOLUTIONS[resolution]
+        if len(buckets) > keep:
+            cutoff = newest - keep * width
+            for start in [start for start in buckets if start <= cutoff]:
+                del buckets[start]
@@ -0,0 +1,138 @@
+"""
+Request Statistics
+
+This module aggregates per-route request counts and latencies in memory so
+the application does not have to write log lines for every request. Once
+per interval a background thread writes the aggregates as a single summary
+log line and resets them, so a window closes on time even when traffic
+goes idle.
+
+Dependencies:
+    - log_manager: For writing the summary line
+    - threading: For thread-safe updates
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from .log_manager import log_manager
+
+# Upper bounds (ms) of the latency histogram bins; the last bin is unbounded
+LATENCY_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class _RouteStats:
+    """Counters for one route during one interval."""
+    
+    __slots__ = ('count', 'client_errors', 'server_errors', 'latency_sum', 'latency_max', 'latency_hist')
+    
+    def __init__(self):
+        self.count = 0
+        self.client_errors = 0
+        self.server_errors = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_hist = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+    
+    def percentile(self, p):
+        """Upper bound of the histogram bin holding the p-th percentile."""
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.latency_hist):
+            seen += n
+            if n and seen >= rank:
+                return LATENCY_BOUNDS_MS[i] if i < len(LATENCY_BOUNDS_MS) else round(self.latency_max, 1)
+        return 0
+    
+    def summary(self):
+        return {
+            'n': self.count,
+            '4xx': self.client_errors,
+            '5xx': self.server_errors,
+            'avg_ms': round(self.latency_sum / self.count, 1) if self.count else 0,
+            'p95_ms': self.percentile(95),
+            'max_ms': round(self.latency_max, 1)
+        }
+
+class RequestStats:
+    """Per-route request counters flushed as one log line per interval.
+    
+    Attributes:
+        interval (int): Seconds between summary lines
+    """
+    
+    def __init__(self, interval=60):
+        self.interval = interval
+        self._routes = {}
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        self._flusher_lock = threading.Lock()
+        self._flusher_pid = None
+    
+    def record(self, route, status_code, latency_ms):
+        """Count one finished request.
+        
+        Args:
+            route (str): Method and URL rule, e.g. ``GET /admin/logs``
+            status_code (int): Response status
+            latency_ms (float): Time spent handling the request
+        """
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = _RouteStats()
+            stats.count += 1
+            if status_code >= 500:
+                stats.server_errors += 1
+            elif status_code >= 400:
+                stats.client_errors += 1
+            stats.latency_sum += latency_ms
+            stats.latency_max = max(stats.latency_max, latency_ms)
+            stats.latency_hist[bisect.bisect_left(LATENCY_BOUNDS_MS, latency_ms)] += 1
+        self._ensure_flusher()
+    
+    def flush(self):
+        """Write the summary for the current interval now, e.g. at shutdown."""
+        with self._lock:
+            window = self._take_window(time.time())
+        self._write_summary(*window)
+    
+    def _ensure_flusher(self):
+        """Start the thread that closes windows, once per process."""
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._flusher_lock:
+            if self._flusher_pid != pid:
+                threading.Thread(target=self._flush_loop, name='request-stats-flusher', daemon=True).start()
+                self._flusher_pid = pid
+    
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                remaining = self._window_start + self.interval - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+                continue
+            with self._lock:
+                window = self._take_window(time.time())
+            self._write_summary(*window)
+    
+    def _take_window(self, now):
+        """Swap out the current counters. Caller holds the lock."""
+        window = (self._window_start, now, self._routes)
+        self._routes = {}
+        self._window_start = now
+        return window
+    
+    @staticmethod
+    def _write_summary(start, end, routes):
+        if not routes:
+            return
+        summary = {
+            'window_s': round(end - start),
+            'requests': sum(stats.count for stats in routes.values()),
+            'routes': {route: stats.summary() for route, stats in sorted(routes.items())}
+        }
+        log_manager.logger.info(f"Request summary: {json.dumps(summary, separators=(',', ':'))}")
@@ -36,6 +36,11 @@ class Config:
     # Security Configuration
     BCRYPT_LOG_ROUNDS = 12
     
+    # Request Logging Configuration
+    REQUEST_LOG_SAMPLE_RATE = float(os.environ.get('REQUEST_LOG_SAMPLE_RATE', '0.01'))
+    REQUEST_LOG_SLOW_MS = float(os.environ.get('REQUEST_LOG_SLOW_MS', '1000'))
+    REQUEST_STATS_INTERVAL = int(os.environ.get('REQUEST_STATS_INTERVAL', '60'))
+    
     @staticmethod
     def init_app(app):
         """Initialize application configuration."""
@@ -0,0 +1,190 @@
+"""
+Chat Load Benchmark
+
+This script drives N concurrent simulated users through the full chat flow
+of a running application: register and log in, create an avatar, start a
+conversation and send K messages. It reports throughput and p50/p95/p99
+latency for the message sends (and time to first token when streaming).
+
+Run it against the stub OpenAI server so no real API calls are made:
+    python scripts/stub_openai_server.py --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 AI_REQUESTS_PER_MINUTE=100000 python run.py
+    python scripts/benchmark_chat.py --base-url http://127.0.0.1:5000 --users 20 --messages 5
+
+Dependencies:
+    - requests: For the simulated browser sessions
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+CSRF_PATTERN = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+AVATAR_PATTERN = re.compile(r'/avatar/(\d+)/')
+CONVERSATION_PATTERN = re.compile(r'/conversation/view/(\d+)')
+
+class UserFlowError(Exception):
+    """Raised when a step of the simulated user flow fails."""
+
+def get_csrf_token(session, url):
+    """Fetch a form page and extract its CSRF token."""
+    response = session.get(url)
+    match = CSRF_PATTERN.search(response.text)
+    if not match:
+        raise UserFlowError(f"No CSRF token found at {url}")
+    return match.group(1)
+
+def set_up_user(base_url, user_index):
+    """Register, log in, create an avatar and start a conversation.
+    
+    Returns:
+        tuple: The logged-in session and the conversation id
+    """
+    session = requests.Session()
+    suffix = f"{user_index}{uuid.uuid4().hex[:8]}"
+    email = f"bench{suffix}@example.com"
+    password = 'benchmark-password'
+    
+    token = get_csrf_token(session, f"{base_url}/auth/register")
+    session.post(f"{base_url}/auth/register", data={
+        'csrf_token': token,
+        'email': email,
+        'username': f"bench{suffix}",
+        'password': password,
+        'confirm_password': password,
+        'terms': 'y'
+    })
+    
+    token = get_csrf_token(session, f"{base_url}/auth/login")
+    response = session.post(f"{base_url}/auth/login", data={
+        'csrf_token': token,
+        'email': email,
+        'password': password
+    }, allow_redirects=False)
+    if response.status_code != 302 or '/auth/login' in response.headers.get('Location', ''):
+        raise UserFlowError(f"Login failed for {email}")
+    
+    response = session.post(f"{base_url}/avatar/create", data={
+        'name': f"Bench Avatar {user_index}",
+        'traits': ['friendly', 'curious'],
+        'interests': ['technology'],
+        'communication_style': 'casual',
+        'knowledge_focus': ['general']
+    }, allow_redirects=False)
+    match = AVATAR_PATTERN.search(response.headers.get('Location', ''))
+    if not match:
+        raise UserFlowError('Avatar creation failed')
+    
+    response = session.get(f"{base_url}/conversation/start/{match.group(1)}", allow_redirects=False)
+    match = CONVERSATION_PATTERN.search(response.headers.get('Location', ''))
+    if not match:
+        raise UserFlowError('Starting the conversation failed')
+    return session, int(match.group(1))
+
+def send_message(session, base_url, conversation_id, content, stream):
+    """Send one chat message and time it.
+    
+    Returns:
+        tuple: Total latency and time to first token in seconds (the
+            latter is None when not streaming)
+    """
+    start = time.perf_counter()
+    if not stream:
+        response = session.post(
+            f"{base_url}/conversation/send/{conversation_id}",
+            data={'message': content},
+            headers={'X-Requested-With': 'XMLHttpRequest'}
+        )
+        if response.status_code != 200 or response.json().get('status') != 'success':
+            raise UserFlowError(f"Send failed with status {response.status_code}")
+        return time.perf_counter() - start, None
+    
+    first_token = None
+    with session.post(
+        f"{base_url}/conversation/stream/{conversation_id}",
+        data={'message': content},
+        headers={'Accept': 'text/event-stream'},
+        stream=True
+    ) as response:
+        if response.status_code != 200:
+            raise UserFlowError(f"Stream failed with status {response.status_code}")
+        for line in response.iter_lines(decode_unicode=True):
+            if line == 'event: token' and first_token is None:
+                first_token = time.perf_counter() - start
+            elif line == 'event: error':
+                raise UserFlowError('Stream reported an error')
+    return time.perf_counter() - start, first_token
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def run_user(base_url, user_index, message_count, stream, results, lock):
+    """Run one simulated user through the whole flow."""
+    try:
+        session, conversation_id = set_up_user(base_url, user_index)
+    except (UserFlowError, requests.RequestException) as e:
+        with lock:
+            results['setup_errors'] += 1
+        print(f"User {user_index}: setup failed: {e}", file=sys.stderr)
+        return
+    
+    for i in range(message_count):
+        # Unique content keeps the response cache out of the measurement
+        content = f"Hello from user {user_index}, message {i} ({uuid.uuid4().hex[:8]}). How are you today?"
+        try:
+            latency, first_token = send_message(session, base_url, conversation_id, content, stream)
+        except (UserFlowError, requests.RequestException, ValueError) as e:
+            with lock:
+                results['errors'] += 1
+            print(f"User {user_index}: message {i} failed: {e}", file=sys.stderr)
+            continue
+        with lock:
+            results['latencies'].append(latency)
+            if first_token is not None:
+                results['first_token'].append(first_token)
+
+def report(results, elapsed, users):
+    """Print the benchmark summary."""
+    latencies = results['latencies']
+    print(f"Users:            {users} ({results['setup_errors']} failed setup)")
+    print(f"Messages sent:    {len(latencies)} ok, {results['errors']} failed")
+    print(f"Wall time:        {elapsed:.2f}s")
+    print(f"Throughput:       {len(latencies) / elapsed:.2f} messages/s")
+    for label, values in (('Latency', latencies), ('First token', results['first_token'])):
+        if values:
+            print(f"{label + ':':<18}p50 {percentile(values, 50) * 1000:.0f}ms  "
+                  f"p95 {percentile(values, 95) * 1000:.0f}ms  "
+                  f"p99 {percentile(values, 99) * 1000:.0f}ms  "
+                  f"max {max(values) * 1000:.0f}ms")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end chat load benchmark')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent simulated users')
+    parser.add_argument('--messages', type=int, default=5, help='Messages sent per user')
+    parser.add_argument('--stream', action='store_true', help='Use the SSE streaming endpoint')
+    args = parser.parse_args(argv)
+    
+    base_url = args.base_url.rstrip('/')
+    results = {'latencies': [], 'first_token': [], 'errors': 0, 'setup_errors': 0}
+    lock = threading.Lock()
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        for user_index in range(args.users):
+            pool.submit(run_user, base_url, user_index, args.messages, args.stream, results, lock)
+    elapsed = time.perf_counter() - start
+    
+    report(results, elapsed, args.users)
+
+if __name__ == '__main__':
+    main()
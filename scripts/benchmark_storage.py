@@ -0,0 +1,103 @@
+"""
+Storage Backend Benchmark
+
+This script compares the JSON-file and SQLite storage backends at several
+store sizes. For each size it fills a fresh store in one batch, reopens it,
+then times random reads, random single-key writes made durable one at a
+time, and a prefix scan over the 100 keys of one user.
+
+Usage:
+    python scripts/benchmark_storage.py
+    python scripts/benchmark_storage.py --sizes 10000 100000 --operations 2000
+
+Dependencies:
+    - storage: The backends being compared
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.persistent import PersistentStorage
+from storage.sqlite_storage import SQLiteStorage
+
+BACKENDS = {
+    'json': lambda path: PersistentStorage(path, flush_interval=0),
+    'sqlite': lambda path: SQLiteStorage(path)
+}
+
+def make_key(i):
+    # Each user prefix holds 100 keys
+    return f"user:{i // 100:05d}:item:{i % 100:02d}"
+
+def make_value(i):
+    return {'id': i, 'name': f"item {i}", 'tags': ['a', 'b'], 'score': i * 0.5}
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+def bench(backend, size, operations):
+    """Time one backend at one store size.
+    
+    Returns:
+        dict: Seconds to fill and open, microseconds per read and write, and scan milliseconds
+    """
+    path = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+    try:
+        store = BACKENDS[backend](path)
+        
+        def fill():
+            with store.batch():
+                for i in range(size):
+                    store.set(make_key(i), make_value(i))
+            store.flush()
+        fill_s, _ = timed(fill)
+        
+        open_s, store = timed(lambda: BACKENDS[backend](path))
+        
+        keys = [make_key(random.randrange(size)) for _ in range(operations)]
+        read_s, _ = timed(lambda: [store.get(key) for key in keys])
+        
+        def write():
+            for n, key in enumerate(keys):
+                store.set(key, make_value(n))
+                store.flush()
+        write_s, _ = timed(write)
+        
+        prefix = f"user:{random.randrange(max(size // 100, 1)):05d}:"
+        scan_s, matched = timed(lambda: sum(1 for _ in store.scan(prefix)))
+        
+        return {
+            'fill_s': fill_s,
+            'open_s': open_s,
+            'read_us': read_s / operations * 1e6,
+            'write_us': write_s / operations * 1e6,
+            'scan_ms': scan_s * 1000,
+            'scanned': matched
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the JSON and SQLite storage backends')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='Store sizes in keys')
+    parser.add_argument('--operations', type=int, default=1000, help='Random reads and writes per run')
+    parser.add_argument('--backends', nargs='+', choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    args = parser.parse_args(argv)
+    
+    print(f"{'backend':<8}{'keys':>10}{'fill s':>10}{'open s':>10}{'read us':>10}{'write us':>10}{'scan ms':>10}{'scanned':>9}")
+    for size in args.sizes:
+        for backend in args.backends:
+            r = bench(backend, size, args.operations)
+            print(f"{backend:<8}{size:>10}{r['fill_s']:>10.2f}{r['open_s']:>10.2f}{r['read_us']:>10.1f}"
+                  f"{r['write_us']:>10.1f}{r['scan_ms']:>10.2f}{r['scanned']:>9}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Stub OpenAI Server
+
+This script runs a local server that speaks the OpenAI models and chat
+completions endpoints, including streamed completions, so the chat flow can
+be load-tested without calling the real API. Latency, reply length and
+error or rate-limit injection are all configurable.
+
+Point the application at it with:
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python run.py
+
+Usage:
+    python scripts/stub_openai_server.py --latency-ms 800 --latency-dist lognormal \\
+        --tokens 120 --error-rate 0.01 --rate-limit-rate 0.02
+
+Dependencies:
+    - aiohttp: For the async web server
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from aiohttp import web
+
+DEFAULT_MODELS = ['gpt-4o-mini-2024-07-18', 'gpt-4o-mini-audio-preview-2024-12-17']
+
+WORDS = ['the', 'avatar', 'thinks', 'about', 'your', 'question', 'and', 'replies',
+         'with', 'a', 'thoughtful', 'answer', 'in', 'character', 'today']
+
+def sample_latency(args):
+    """Draw a response latency in seconds from the configured distribution."""
+    mean = args.latency_ms / 1000
+    if args.latency_dist == 'fixed':
+        return mean
+    if args.latency_dist == 'uniform':
+        jitter = args.latency_jitter_ms / 1000
+        return max(0.0, random.uniform(mean - jitter, mean + jitter))
+    # Log-normal with the requested mean, a common shape for model latency
+    sigma = args.latency_sigma
+    return random.lognormvariate(0, sigma) * mean / math.exp(sigma ** 2 / 2)
+
+def sample_tokens(args):
+    """Draw a completion length in tokens."""
+    return max(1, int(random.gauss(args.tokens, args.tokens_jitter)))
+
+def injected_error(args):
+    """Return an error response if one should be injected, otherwise None."""
+    roll = random.random()
+    if roll < args.rate_limit_rate:
+        return web.json_response(
+            {'error': {'message': 'Rate limit reached (stub)', 'type': 'rate_limit_error'}},
+            status=429,
+            headers={'Retry-After': str(args.retry_after)}
+        )
+    if roll < args.rate_limit_rate + args.error_rate:
+        return web.json_response(
+            {'error': {'message': 'Internal server error (stub)', 'type': 'server_error'}},
+            status=500
+        )
+    return None
+
+def usage_for(body, completion_tokens):
+    """Build a usage block with a rough prompt token count."""
+    prompt_chars = sum(len(m.get('content') or '') for m in body.get('messages', []))
+    prompt_tokens = prompt_chars // 4 + 4 * len(body.get('messages', []))
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens
+    }
+
+async def list_models(request):
+    """GET /v1/models"""
+    args = request.app['args']
+    await asyncio.sleep(sample_latency(args) / 10)
+    return web.json_response({
+        'object': 'list',
+        'data': [{'id': model, 'object': 'model', 'owned_by': 'stub'} for model in args.models]
+    })
+
+async def chat_completions(request):
+    """POST /v1/chat/completions, streamed or not."""
+    args = request.app['args']
+    body = await request.json()
+    request.app['stats']['requests'] += 1
+    
+    error = injected_error(args)
+    if error is not None:
+        request.app['stats']['errors'] += 1
+        return error
+    
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+    model = body.get('model', args.models[0])
+    tokens = sample_tokens(args)
+    words = [random.choice(WORDS) for _ in range(tokens)]
+    latency = sample_latency(args)
+    
+    if not body.get('stream'):
+        await asyncio.sleep(latency)
+        return web.json_response({
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ' '.join(words)},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage_for(body, tokens)
+        })
+    
+    response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+    await response.prepare(request)
+    
+    async def send(payload):
+        await response.write(f"data: {json.dumps(payload)}\n\n".encode('utf-8'))
+    
+    # Time to first token, then a steady stream of deltas
+    await asyncio.sleep(args.ttft_ms / 1000 if args.ttft_ms is not None else latency)
+    for i, word in enumerate(words):
+        await send({
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'model': model,
+            'choices': [{'index': 0, 'delta': {'content': word if i == 0 else f" {word}"}}]
+        })
+        if args.token_interval_ms:
+            await asyncio.sleep(args.token_interval_ms / 1000)
+    
+    await send({
+        'id': completion_id,
+        'object': 'chat.completion.chunk',
+        'model': model,
+        'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]
+    })
+    if (body.get('stream_options') or {}).get('include_usage'):
+        await send({
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'model': model,
+            'choices': [],
+            'usage': usage_for(body, tokens)
+        })
+    await response.write(b"data: [DONE]\n\n")
+    await response.write_eof()
+    return response
+
+async def stub_stats(request):
+    """GET /stats: counts of requests served and errors injected."""
+    return web.json_response(request.app['stats'])
+
+def create_stub_app(args):
+    """Create the stub aiohttp application."""
+    app = web.Application()
+    app['args'] = args
+    app['stats'] = {'requests': 0, 'errors': 0}
+    app.router.add_get('/v1/models', list_models)
+    app.router.add_post('/v1/chat/completions', chat_completions)
+    app.router.add_get('/stats', stub_stats)
+    return app
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible stub server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS,
+                        help='Model ids returned by /v1/models')
+    parser.add_argument('--latency-dist', choices=['fixed', 'uniform', 'lognormal'], default='lognormal',
+                        help='Distribution of response latency')
+    parser.add_argument('--latency-ms', type=float, default=500,
+                        help='Mean response latency (time to first token when streaming)')
+    parser.add_argument('--latency-jitter-ms', type=float, default=200,
+                        help='Half-width of the uniform distribution')
+    parser.add_argument('--latency-sigma', type=float, default=0.5,
+                        help='Shape of the log-normal distribution')
+    parser.add_argument('--ttft-ms', type=float, default=None,
+                        help='Fixed time to first token for streams (defaults to a latency sample)')
+    parser.add_argument('--token-interval-ms', type=float, default=15,
+                        help='Delay between streamed tokens')
+    parser.add_argument('--tokens', type=int, default=80, help='Mean completion length in tokens')
+    parser.add_argument('--tokens-jitter', type=int, default=20, help='Std deviation of completion length')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failing with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of requests failing with 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429s')
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args()
+    print(f"Stub OpenAI server on http://{args.host}:{args.port}/v1")
+    web.run_app(create_stub_app(args), host=args.host, port=args.port, print=None)
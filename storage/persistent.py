@@ -8,26 +8,189 @@ It implements a file-based storage mechanism with the following features:
 - JSON-based file storage for data persistence
 - Automatic storage directory management
 - Global storage instance management
+- Append-only journal so each write costs the size of the change
+- Write coalescing, batches and explicit flushes
+- Safe sharing of one store between several worker processes
+- Pluggable backends behind init_storage/get_storage
+- Per-key TTLs and an optional memory cap with LRU eviction
+
+In journal mode (the default) every mutation is appended to
+``persistent_data.journal`` as one compact JSON record instead of rewriting
+``persistent_data.json``. Loading reads the snapshot and replays the
+journal. Once the journal passes a size threshold a background thread
+writes a fresh snapshot and starts a new journal.
+
+Mutations update memory immediately and are written by a background
+flusher shortly afterwards, so a burst of writes within the flush interval
+becomes one durable write. ``with storage.batch():`` holds writes until the
+block ends, and ``flush()`` writes pending changes before returning.
+
+Processes sharing a storage directory take an exclusive lock on
+``persistent_data.lock`` for every write and bump a generation counter in
+``persistent_data.gen``, which each process maps into memory. Reads compare
+the counter with the last generation seen, and only when another process
+has written do they read its journal records (or reload the snapshot).
+The same file holds a journal epoch, bumped whenever compaction replaces
+the journal, which tells the other processes to reload rather than read on
+from their old offset.
+Snapshots are written to a temporary file and renamed into place, and a
+snapshot that cannot be parsed raises StorageCorruptedError instead of
+being read as empty.
+
+``set(key, value, ttl=...)`` gives a key an expiry time. Expired keys read
+as missing and a background sweeper drops them from memory; they are left
+out of the next snapshot. With ``max_memory`` set, writes that take the
+estimated size of the values past the cap evict the least recently used
+keys that are not pinned, as deletes. Keys with a TTL can be evicted by
+default; keys without one are pinned. Expiry times and evictability are
+kept in journal records and in ``persistent_data.meta.json`` next to the
+snapshot.
+
+StorageBackend is the interface shared by PersistentStorage and the SQLite
+backend in ``sqlite_storage``; ``init_storage(path, backend='sqlite')``
+selects the latter, which suits stores too large to keep in memory.
 
 Key Components:
+- StorageBackend: Interface implemented by every storage backend
 - PersistentStorage: Main storage class implementing thread-safe operations
+- InterProcessLock: Exclusive lock shared by every process using a store
 - Global storage instance management functions
 - Automatic storage directory creation and initialization
 - Error handling for file operations
 
 Dependencies:
+    - abc: For the backend interface
+    - atexit: For flushing pending writes at exit
+    - fcntl: For the inter-process lock (msvcrt on Windows)
     - json: For data serialization/deserialization
-    - threading: For thread-safe operations
+    - mmap: For reading the shared generation counter and journal epoch
+    - threading: For thread-safe operations and the background flusher
     - os: For file and directory operations
+    - shutil: For merging journals
     - typing: For type hints
 """
 
+import atexit
 import json
+import mmap
 import os
+import shutil
+import struct
 import threading
-from typing import Any, Dict, Optional
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Journal size (bytes) after which a new snapshot is written
+COMPACT_THRESHOLD = 4 * 1024 * 1024
+
+# Seconds to wait for further changes before writing; 0 writes on every change
+FLUSH_INTERVAL = 0.05
 
-class PersistentStorage:
+# Seconds between sweeps for expired keys
+SWEEP_INTERVAL = 60
+
+_MISSING = object()
+
+# The shared counter file holds the write generation, then the journal epoch
+_GENERATION = struct.Struct('<Q')
+_COUNTERS_SIZE = 2 * _GENERATION.size
+_EPOCH_OFFSET = _GENERATION.size
+
+class StorageCorruptedError(RuntimeError):
+    """The storage snapshot exists but cannot be parsed."""
+
+class StorageBackend(ABC):
+    """Interface implemented by every storage backend.
+    
+    Values are anything JSON can represent. Backends are thread-safe and
+    may be shared by several processes.
+    """
+    
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value stored under ``key``, or ``default``."""
+    
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, pinned: Optional[bool] = None) -> None:
+        """Store a value, optionally expiring ``ttl`` seconds from now.
+        
+        ``pinned`` keys are never evicted; by default keys with a TTL are not pinned.
+        """
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove ``key`` if it is stored."""
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every key."""
+    
+    @abstractmethod
+    def scan(self, prefix: str = '') -> Iterator[Tuple[str, Any]]:
+        """Yield ``(key, value)`` pairs whose key starts with ``prefix``, in key order."""
+    
+    @abstractmethod
+    def batch(self) -> ContextManager['StorageBackend']:
+        """Context manager that applies many changes and writes them once."""
+    
+    @abstractmethod
+    def flush(self) -> None:
+        """Make every change so far durable before returning."""
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Counters describing the backend's activity."""
+
+class InterProcessLock:
+    """An exclusive lock on a file, shared by every process that opens it.
+    
+    Uses ``fcntl.flock`` where available and ``msvcrt.locking`` otherwise.
+    The lock file is reopened after a fork so parent and child do not share
+    one lock. Threads within a process must be serialised separately.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+    
+    def __enter__(self) -> 'InterProcessLock':
+        if self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+def _write_json_atomic(path: str, data: Any, **dump_options: Any) -> None:
+    """Write JSON to a temporary file, fsync it and rename it over ``path``."""
+    tmp_file = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, **dump_options)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+class PersistentStorage(StorageBackend):
     """A thread-safe persistent storage implementation.
     
     This class provides a robust storage system with the following features:
@@ -35,55 +198,498 @@ class PersistentStorage:
     - In-memory caching with file persistence
     - Automatic storage directory management
     - JSON-based data serialization
+    - Optional append-only journal with background compaction
+    - Debounced background flushing that coalesces writes
+    - Multi-process safety through a file lock and generation counter
+    - Per-key TTLs and an optional LRU-evicted memory cap
+    
+    Locks are always taken in the order ``_write_lock``, ``_interprocess_lock``,
+    ``_lock``.
     
     Attributes:
         _storage_file (str): Path to the JSON storage file
+        _journal_file (str): Path to the append-only journal
         _lock (threading.Lock): Thread synchronization lock
+        _write_lock (threading.Lock): Serialises disk writes within the process
+        _interprocess_lock (InterProcessLock): Serialises disk writes across processes
         _cache (Dict[str, Any]): In-memory cache of stored values
+        mutations (int): Changes made through set, delete and clear
+        writes (int): Durable writes made for those changes
+        coalesced_writes (int): Changes that shared a write with another
+        reloads (int): Times changes from other processes were read
+        hits (int): Reads that found a live key
+        misses (int): Reads of missing or expired keys
+        evictions (int): Keys evicted to stay under the memory cap
+        expirations (int): Expired keys dropped from memory
     """
     
-    def __init__(self, storage_path: str):
+    def __init__(self,
+                 storage_path: str,
+                 journal: bool = True,
+                 compact_threshold: int = COMPACT_THRESHOLD,
+                 flush_interval: float = FLUSH_INTERVAL,
+                 max_memory: Optional[int] = None,
+                 sweep_interval: float = SWEEP_INTERVAL):
         """Initialize the storage with the given file path.
         
         Args:
             storage_path: Path to the storage directory
-            
+            journal: Append mutations to a journal instead of rewriting the file
+            compact_threshold: Journal size in bytes that triggers compaction
+            flush_interval: Seconds to collect changes into one write
+            max_memory: Cap in bytes on the JSON-encoded size of keys and values
+            sweep_interval: Seconds between sweeps for expired keys
+        
         Note:
             Creates the storage directory and file if they don't exist
+        
+        Raises:
+            StorageCorruptedError: If the storage file cannot be parsed
         """
         self._storage_file = os.path.join(storage_path, 'persistent_data.json')
+        self._journal_file = os.path.join(storage_path, 'persistent_data.journal')
+        self._compacting_file = self._journal_file + '.compacting'
+        self._generation_file = os.path.join(storage_path, 'persistent_data.gen')
+        self._meta_file = os.path.join(storage_path, 'persistent_data.meta.json')
+        self._journal_enabled = journal
+        self._compact_threshold = compact_threshold
+        self._journal = None
+        self._journal_epoch: Optional[int] = None  # Epoch of the open journal
+        self._journal_offset = 0  # End of the last complete record read or written
+        self._journal_torn = False  # Part of a record torn by a crash follows the offset
+        self._compactor: Optional[threading.Thread] = None
         self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._interprocess_lock = InterProcessLock(os.path.join(storage_path, 'persistent_data.lock'))
+        self._generation_map: Optional[mmap.mmap] = None
+        self._seen_generation: Optional[int] = None
         self._cache: Dict[str, Any] = {}
+        
+        # Expiry times, and keys that may be evicted in LRU order
+        self._expires: Dict[str, float] = {}
+        self._evictable: OrderedDict = OrderedDict()
+        self._max_memory = max_memory
+        self._sizes: Dict[str, int] = {}  # Only tracked with a memory cap
+        self._memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+        # Changes not yet on disk, coalesced by key
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_clear = False
+        self._pending_count = 0
+        self._batch_depth = 0
+        self.mutations = 0
+        self.writes = 0
+        self.coalesced_writes = 0
+        self.reloads = 0
+        
+        # The flusher thread is started on first write, once per process
+        self._flush_interval = flush_interval
+        self._flush_wanted = threading.Event()
+        self._flusher_lock = threading.Lock()
+        self._flusher_pid: Optional[int] = None
+        self._sweep_interval = sweep_interval
+        self._sweeper_pid: Optional[int] = None
+        
         self._ensure_storage_exists()
         self._load_data()
+        atexit.register(self.flush)
     
     def _ensure_storage_exists(self) -> None:
-        """Ensure the storage directory and file exist."""
+        """Ensure the storage directory, file and generation counter exist."""
         os.makedirs(os.path.dirname(self._storage_file), exist_ok=True)
-        if not os.path.exists(self._storage_file):
-            with open(self._storage_file, 'w') as f:
-                json.dump({}, f)
+        with self._interprocess_lock:
+            if not os.path.exists(self._storage_file):
+                _write_json_atomic(self._storage_file, {})
+            with open(self._generation_file, 'ab') as f:
+                # Created empty, or holding only the generation in older stores
+                if f.tell() < _COUNTERS_SIZE:
+                    f.write(bytes(_COUNTERS_SIZE - f.tell()))
+        with open(self._generation_file, 'r+b') as f:
+            self._generation_map = mmap.mmap(f.fileno(), _COUNTERS_SIZE)
+    
+    def _generation(self) -> int:
+        """The shared generation counter, bumped by every write from any process."""
+        return _GENERATION.unpack_from(self._generation_map)[0]
+    
+    def _bump_generation(self) -> None:
+        """Record a write. Caller holds the inter-process lock."""
+        generation = self._generation() + 1
+        _GENERATION.pack_into(self._generation_map, 0, generation)
+        self._seen_generation = generation
+    
+    def _shared_epoch(self) -> int:
+        """The shared journal epoch, bumped whenever a journal is replaced or removed."""
+        return _GENERATION.unpack_from(self._generation_map, _EPOCH_OFFSET)[0]
+    
+    def _bump_epoch(self) -> None:
+        """Record that the journal was replaced. Caller holds the inter-process lock."""
+        _GENERATION.pack_into(self._generation_map, _EPOCH_OFFSET, self._shared_epoch() + 1)
     
     def _load_data(self) -> None:
-        """Load data from the storage file into memory."""
-        with self._lock:
+        """Load data from the storage file into memory and replay the journal."""
+        with self._write_lock, self._interprocess_lock, self._lock:
+            self._reload()
+            self._seen_generation = self._generation()
+        
+        if self._expires:
+            self._ensure_sweeper()
+        if self._journal_enabled and os.path.exists(self._compacting_file):
+            self._compact()
+    
+    def _reload(self) -> None:
+        """Read the snapshot and journals from scratch.
+        
+        Caller holds the inter-process lock and ``_lock``.
+        
+        Raises:
+            StorageCorruptedError: If the storage file cannot be parsed
+        """
+        self._apply({'op': 'clear'})
+        self._cache = self._read_json(self._storage_file)
+        meta = self._read_json(self._meta_file) if os.path.exists(self._meta_file) else {}
+        for key, (expires, evictable) in meta.items():
+            if key in self._cache:
+                if expires is not None:
+                    self._expires[key] = expires
+                if evictable:
+                    self._evictable[key] = None
+        if self._max_memory:
+            for key, value in self._cache.items():
+                self._account(key, value)
+        
+        # A journal left by an interrupted compaction comes first. Both are
+        # replayed in either mode, since the store may have been written in
+        # journal mode before it was opened without one.
+        if os.path.exists(self._compacting_file):
+            self._replay(self._compacting_file, 0)
+        if self._journal_enabled:
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self._journal_file, 'ab')
+            self._journal_epoch = self._shared_epoch()
+            self._journal_offset, self._journal_torn = self._replay(self._journal_file, 0)
+        elif os.path.exists(self._journal_file):
+            self._replay(self._journal_file, 0)
+        self._drop_expired(time.time())
+        
+        if not self._journal_enabled and (os.path.exists(self._compacting_file) or os.path.exists(self._journal_file)):
+            # Fold the journals into the snapshot, which is all this mode writes
+            self._write_snapshot(*self._snapshot(), indent=2)
+            for path in (self._compacting_file, self._journal_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._bump_epoch()
+            self._bump_generation()
+    
+    @staticmethod
+    def _read_json(path: str) -> Dict[str, Any]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            raise StorageCorruptedError(f"Cannot parse {path}: {e}") from e
+    
+    def _snapshot(self) -> Tuple[Dict[str, Any], Dict[str, list]]:
+        """Live data, and ``[expires, evictable]`` for keys that have either. Caller holds the lock."""
+        now = time.time()
+        expired = {key for key, expires in self._expires.items() if expires <= now}
+        data = {k: v for k, v in self._cache.items() if k not in expired} if expired else self._cache.copy()
+        meta = {
+            key: [self._expires.get(key), key in self._evictable]
+            for key in self._expires.keys() | self._evictable.keys()
+            if key not in expired
+        }
+        return data, meta
+    
+    def _write_snapshot(self, data: Dict[str, Any], meta: Dict[str, list], **dump_options: Any) -> None:
+        """Write the key metadata, then the snapshot it belongs to.
+        
+        If the process dies in between, the old snapshot is read with the
+        new metadata, which only applies to keys present in it.
+        """
+        _write_json_atomic(self._meta_file, meta, separators=(',', ':'))
+        _write_json_atomic(self._storage_file, data, **dump_options)
+    
+    def _replay(self, path: str, start: int) -> Tuple[int, bool]:
+        """Apply the complete records of a journal from ``start``. Caller holds the lock.
+        
+        Returns:
+            The offset after the last complete record, and whether part of an
+            incomplete record follows it
+        """
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
             try:
-                with open(self._storage_file, 'r') as f:
-                    self._cache = json.load(f)
+                record = json.loads(line)
             except json.JSONDecodeError:
-                self._cache = {}
+                # A record torn by a crash mid-append, finished by the next writer
+                continue
+            self._apply(record)
+        return start + end, end < len(data)
+    
+    def _catch_up(self) -> None:
+        """Apply writes made by other processes since the last one seen.
+        
+        Caller holds the inter-process lock and ``_lock``. Pending local
+        changes are applied again afterwards, since they will be written
+        after the changes just read.
+        """
+        generation = self._generation()
+        if generation == self._seen_generation:
+            return
+        if self._journal_enabled and self._shared_epoch() == self._journal_epoch:
+            self._journal_offset, self._journal_torn = self._replay(self._journal_file, self._journal_offset)
+        else:
+            # Compacted by another process, or snapshot mode
+            self._reload()
+        if self._pending_clear:
+            self._apply({'op': 'clear'})
+        for record in self._pending.values():
+            self._apply(record)
+        # Reloading may have written a snapshot and bumped the generation
+        self._seen_generation = self._generation()
+        self.reloads += 1
+    
+    def _refresh(self) -> None:
+        """Catch up if another process has written since the last check."""
+        if self._generation() == self._seen_generation:
+            return
+        with self._write_lock, self._interprocess_lock, self._lock:
+            self._catch_up()
+    
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """Apply one journal record to the cache. Caller holds the lock."""
+        op = record.get('op')
+        if op == 'set':
+            key = record['k']
+            self._cache[key] = record['v']
+            if 'e' in record:
+                self._expires[key] = record['e']
+            else:
+                self._expires.pop(key, None)
+            if record.get('x'):
+                self._evictable[key] = None
+                self._evictable.move_to_end(key)
+            else:
+                self._evictable.pop(key, None)
+            if self._max_memory:
+                self._account(key, record['v'])
+        elif op == 'del':
+            self._drop(record['k'])
+        elif op == 'clear':
+            self._cache.clear()
+            self._expires.clear()
+            self._evictable.clear()
+            self._sizes.clear()
+            self._memory = 0
+    
+    def _account(self, key: str, value: Any) -> None:
+        """Track the estimated size of a key and value. Caller holds the lock."""
+        size = len(key) + len(json.dumps(value, separators=(',', ':')))
+        self._memory += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+    
+    def _drop(self, key: str) -> None:
+        """Remove a key from memory. Caller holds the lock."""
+        self._cache.pop(key, None)
+        self._expires.pop(key, None)
+        self._evictable.pop(key, None)
+        self._memory -= self._sizes.pop(key, 0)
+    
+    def _drop_expired(self, now: float) -> None:
+        """Remove expired keys from memory. Caller holds the lock."""
+        expired = [key for key, expires in self._expires.items() if expires <= now]
+        for key in expired:
+            self._drop(key)
+        self.expirations += len(expired)
+    
+    def _evict(self) -> None:
+        """Delete least recently used evictable keys until under the memory cap. Caller holds the lock."""
+        while self._memory > self._max_memory and self._evictable:
+            key = next(iter(self._evictable))
+            self._drop(key)
+            self._queue({'op': 'del', 'k': key})
+            self.evictions += 1
+    
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        """Append records to the journal in one durable write.
+        
+        Caller holds the write lock and the inter-process lock, and has caught up.
+        """
+        data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records).encode('utf-8')
+        if self._journal_torn:
+            # Finish a record torn by a crash so the next one starts on its own line
+            data = b'\n' + data
+        self._journal.write(data)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_offset = self._journal.tell()
+        self._journal_torn = False
+        if self._journal_offset >= self._compact_threshold and (self._compactor is None or not self._compactor.is_alive()):
+            self._compactor = threading.Thread(target=self._compact, name='storage-compactor', daemon=True)
+            self._compactor.start()
+    
+    def _compact(self) -> None:
+        """Write the current data as a new snapshot and drop the journal it covers.
+        
+        Runs under the write and inter-process locks, so other processes wait
+        to write or catch up, but readers and writers in this process only
+        wait for the catch-up and a dictionary copy. The journal is moved
+        aside before the snapshot is written; if the process dies before the
+        moved journal is removed, loading replays it, which only repeats
+        changes the new snapshot already holds.
+        """
+        with self._write_lock, self._interprocess_lock:
+            with self._lock:
+                self._catch_up()
+                # Changes still pending go to the new journal; replaying them
+                # over the snapshot that already holds them is harmless too
+                data, meta = self._snapshot()
+            
+            self._journal.close()
+            if os.path.exists(self._compacting_file):
+                # Left by an interrupted compaction; the two journals concatenated
+                # are still one valid journal
+                with open(self._compacting_file, 'ab') as dst, open(self._journal_file, 'rb') as src:
+                    dst.write(b'\n')
+                    shutil.copyfileobj(src, dst)
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(self._journal_file)
+            else:
+                os.replace(self._journal_file, self._compacting_file)
+            self._journal = open(self._journal_file, 'ab')
+            self._bump_epoch()
+            self._journal_epoch = self._shared_epoch()
+            self._journal_offset, self._journal_torn = 0, False
+            
+            self._write_snapshot(data, meta, separators=(',', ':'))
+            os.remove(self._compacting_file)
+            self._bump_generation()
+    
+    def flush(self) -> None:
+        """Write pending changes to disk and wait until they are durable."""
+        with self._write_lock, self._interprocess_lock:
+            with self._lock:
+                if not self._pending_count:
+                    return
+                self._catch_up()
+                taken = (self._pending, self._pending_clear, self._pending_count)
+                records = ([{'op': 'clear'}] if self._pending_clear else []) + list(self._pending.values())
+                self._pending, self._pending_clear, self._pending_count = {}, False, 0
+                # Copy inside the write lock so snapshots reach disk in order
+                snapshot = None if self._journal_enabled else self._snapshot()
+            
+            try:
+                if self._journal_enabled:
+                    self._append(records)
+                else:
+                    self._write_snapshot(*snapshot, indent=2)
+            except Exception:
+                self._restore_pending(*taken)
+                raise
+            self._bump_generation()
+            
+            with self._lock:
+                self.writes += 1
+                self.coalesced_writes += taken[2] - 1
+    
+    sync = flush
     
-    def _save_data(self) -> None:
-        """Save the current cache to the storage file."""
-        # Prepare data while not holding the lock
-        data_to_save = None
+    def _restore_pending(self, pending: Dict[str, Dict[str, Any]], clear: bool, count: int) -> None:
+        """Put back changes whose write failed, before any made since."""
         with self._lock:
-            data_to_save = self._cache.copy()
+            if not self._pending_clear:
+                pending.update(self._pending)
+                self._pending, self._pending_clear = pending, clear
+            self._pending_count += count
+    
+    @contextmanager
+    def batch(self) -> Iterator['PersistentStorage']:
+        """Apply many changes and write them once, when the block ends.
         
-        # Write to file without holding the lock
-        if data_to_save is not None:
-            with open(self._storage_file, 'w') as f:
-                json.dump(data_to_save, f, indent=2)
+        Example:
+            with storage.batch():
+                for key, value in items:
+                    storage.set(key, value)
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                outermost = self._batch_depth == 0
+            if outermost:
+                self.flush()
+    
+    def stats(self) -> Dict[str, int]:
+        """Counts of changes, durable writes, coalesced writes and reloads"""
+        with self._lock:
+            return {
+                'mutations': self.mutations,
+                'writes': self.writes,
+                'coalesced_writes': self.coalesced_writes,
+                'pending': self._pending_count,
+                'reloads': self.reloads,
+                'keys': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'memory': self._memory
+            }
+    
+    def _ensure_flusher(self) -> None:
+        """Start the flusher thread once per process."""
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._flusher_lock:
+            if self._flusher_pid != pid:
+                self._flush_wanted = threading.Event()
+                threading.Thread(target=self._flush_loop, name='storage-flusher', daemon=True).start()
+                self._flusher_pid = pid
+    
+    def _flush_loop(self) -> None:
+        """Write pending changes once they have had time to coalesce."""
+        while True:
+            self._flush_wanted.wait()
+            time.sleep(self._flush_interval)
+            self._flush_wanted.clear()
+            if self._batch_depth:
+                # The batch flushes when it ends
+                continue
+            try:
+                self.flush()
+            except OSError:
+                # Changes stay pending; try again after the next interval
+                self._flush_wanted.set()
+    
+    def _ensure_sweeper(self) -> None:
+        """Start the expiry sweeper thread once per process."""
+        pid = os.getpid()
+        if self._sweeper_pid == pid:
+            return
+        with self._flusher_lock:
+            if self._sweeper_pid != pid:
+                threading.Thread(target=self._sweep_loop, name='storage-sweeper', daemon=True).start()
+                self._sweeper_pid = pid
+    
+    def _sweep_loop(self) -> None:
+        """Drop expired keys from memory so they do not wait for a read."""
+        while True:
+            time.sleep(self._sweep_interval)
+            with self._lock:
+                self._drop_expired(time.time())
     
     def get(self, key: str, default: Any = None) -> Any:
         """Retrieve a value from storage.
@@ -91,24 +697,59 @@ class PersistentStorage:
         Args:
             key: The key to retrieve
             default: Value to return if key doesn't exist
-            
+        
         Returns:
             The stored value or the default
         """
+        self._refresh()
         with self._lock:
-            return self._cache.get(key, default)
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            expires = self._expires.get(key)
+            if expires is not None and expires <= time.time():
+                # Expired keys stay on disk until the next snapshot leaves them out
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            if key in self._evictable:
+                self._evictable.move_to_end(key)
+            self.hits += 1
+            return value
     
-    def set(self, key: str, value: Any) -> None:
+    def scan(self, prefix: str = '') -> Iterator[Tuple[str, Any]]:
+        """Yield stored items whose key starts with ``prefix``, in key order.
+        
+        This visits every key; the SQLite backend answers from its index.
+        """
+        self._refresh()
+        now = time.time()
+        with self._lock:
+            items = sorted(
+                (k, v) for k, v in self._cache.items()
+                if k.startswith(prefix) and self._expires.get(k, now + 1) > now
+            )
+        yield from items
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, pinned: Optional[bool] = None) -> None:
         """Store a value in storage.
         
         Args:
             key: The key to store the value under
             value: The value to store
+            ttl: Seconds until the key expires; None keeps it until deleted
+            pinned: Exempt the key from LRU eviction; defaults to True
+                when there is no TTL
         """
-        with self._lock:
-            self._cache[key] = value
-        # Save data after releasing the lock
-        self._save_data()
+        record = {'op': 'set', 'k': key, 'v': value}
+        if ttl is not None:
+            record['e'] = time.time() + ttl
+            self._ensure_sweeper()
+        if not (pinned if pinned is not None else ttl is None):
+            record['x'] = 1
+        self._mutate(record)
     
     def delete(self, key: str) -> None:
         """Delete a value from storage.
@@ -116,40 +757,70 @@ class PersistentStorage:
         Args:
             key: The key to delete
         """
-        with self._lock:
-            self._cache.pop(key, None)
-        # Save data after releasing the lock
-        self._save_data()
+        self._mutate({'op': 'del', 'k': key})
     
     def clear(self) -> None:
         """Clear all stored values."""
+        self._mutate({'op': 'clear'})
+    
+    def _mutate(self, record: Dict[str, Any]) -> None:
+        """Apply a mutation and schedule it to be written."""
         with self._lock:
-            self._cache.clear()
-        # Save data after releasing the lock
-        self._save_data()
+            self._apply(record)
+            self.mutations += 1
+            self._queue(record)
+            if self._max_memory and self._memory > self._max_memory:
+                self._evict()
+            if self._batch_depth:
+                return
+        
+        if self._flush_interval > 0:
+            self._ensure_flusher()
+            self._flush_wanted.set()
+        else:
+            self.flush()
+    
+    def _queue(self, record: Dict[str, Any]) -> None:
+        """Add a change to the pending writes. Caller holds the lock."""
+        self._pending_count += 1
+        if record['op'] == 'clear':
+            self._pending, self._pending_clear = {}, True
+        else:
+            self._pending[record['k']] = record
 
 # Create a global instance
-_storage: Optional[PersistentStorage] = None
+_storage: Optional[StorageBackend] = None
 
-def init_storage(storage_path: str) -> None:
+def init_storage(storage_path: str, backend: str = 'json', **options: Any) -> None:
     """Initialize the global storage instance.
     
     Args:
         storage_path: Path to the storage directory
+        backend: ``json`` for PersistentStorage or ``sqlite`` for SQLiteStorage
+        **options: Passed on to the backend, e.g. ``journal=False``
+    
+    Raises:
+        ValueError: If the backend is not known
     """
     global _storage
     if _storage is None:
-        _storage = PersistentStorage(storage_path)
+        if backend == 'json':
+            _storage = PersistentStorage(storage_path, **options)
+        elif backend == 'sqlite':
+            from .sqlite_storage import SQLiteStorage
+            _storage = SQLiteStorage(storage_path, **options)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
 
-def get_storage() -> PersistentStorage:
+def get_storage() -> StorageBackend:
     """Get the global storage instance.
     
     Returns:
-        The global PersistentStorage instance
-        
+        The global storage backend
+    
     Raises:
         RuntimeError: If storage hasn't been initialized
     """
     if _storage is None:
         raise RuntimeError("Storage not initialized. Call init_storage first.")
-    return _storage 
\ No newline at end of file
+    return _storage
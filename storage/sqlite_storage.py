@@ -0,0 +1,335 @@
+"""
+SQLite Storage Module
+
+This module provides a SQLite-backed implementation of the storage backend
+interface, for stores too large to keep in memory and rewrite as one JSON
+file. Keys live in a ``WITHOUT ROWID`` table whose primary key is a B-tree,
+so each read and write is O(log n) and prefix scans are index range scans.
+
+The database runs in WAL mode, so readers in every thread and process keep
+reading while one writer commits. A bounded LRU cache keeps hot values
+decoded in memory. It is cleared whenever ``PRAGMA data_version`` shows a
+commit from another connection, so it never serves values another process
+has replaced.
+
+Keys may carry an expiry time. Expired rows read as missing, are skipped
+by scans and are deleted by a background sweeper using an index on the
+expiry column. Values live on disk, so there is no memory cap or pinning;
+the hot cache is the only bounded memory and is LRU-evicted.
+
+On first use an existing ``persistent_data.json`` store in the same
+directory (including its journal) is copied into the database once. The
+JSON files are left in place.
+
+Key Components:
+- SQLiteStorage: SQLite storage backend with a hot-key cache
+- Per-thread connections, reopened after a fork
+- One-time migration from the JSON store
+
+Dependencies:
+    - sqlite3: For the database
+    - json: For value serialization
+    - threading: For per-thread connections and the cache lock
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from .persistent import SWEEP_INTERVAL, PersistentStorage, StorageBackend
+
+DB_FILENAME = 'persistent_data.sqlite3'
+
+# Decoded values kept in memory, most recently used last
+HOT_CACHE_SIZE = 4096
+
+# Rows fetched at a time by prefix scans
+SCAN_FETCH_SIZE = 500
+
+# Cache markers for keys known to be absent and keys not in the cache
+_ABSENT = object()
+_NOT_CACHED = object()
+
+class SQLiteStorage(StorageBackend):
+    """A thread-safe key-value store in a SQLite database.
+    
+    Attributes:
+        _db_file (str): Path to the database file
+        _local (threading.local): This thread's connection and batch depth
+        _cache (OrderedDict): Hot decoded values in LRU order
+        hits (int): Reads answered from the hot cache
+        misses (int): Reads that went to the database
+        evictions (int): Values evicted from the hot cache
+        expirations (int): Expired rows deleted by the sweeper
+        writes (int): Keys written, deleted or cleared
+    """
+    
+    def __init__(self,
+                 storage_path: str,
+                 cache_size: int = HOT_CACHE_SIZE,
+                 migrate: bool = True,
+                 sweep_interval: float = SWEEP_INTERVAL):
+        """Open or create the database in the given directory.
+        
+        Args:
+            storage_path: Path to the storage directory
+            cache_size: Maximum number of values in the hot cache
+            migrate: Copy an existing JSON store into a new database
+            sweep_interval: Seconds between sweeps for expired rows
+        """
+        os.makedirs(storage_path, exist_ok=True)
+        self._db_file = os.path.join(storage_path, DB_FILENAME)
+        self._local = threading.local()
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._cache_epoch = 0  # Bumped by every write so stale reads are not cached
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.writes = 0
+        self._sweep_interval = sweep_interval
+        self._sweeper_lock = threading.Lock()
+        self._sweeper_pid: Optional[int] = None
+        
+        conn = self._connection()
+        conn.execute('CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL) WITHOUT ROWID')
+        if 'expires_at' not in {row[1] for row in conn.execute('PRAGMA table_info(kv)')}:
+            conn.execute('ALTER TABLE kv ADD COLUMN expires_at REAL')
+        conn.execute('CREATE INDEX IF NOT EXISTS kv_expires_at ON kv (expires_at) WHERE expires_at IS NOT NULL')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        if conn.execute('SELECT 1 FROM kv WHERE expires_at IS NOT NULL LIMIT 1').fetchone():
+            self._ensure_sweeper()
+        if migrate and os.path.exists(os.path.join(storage_path, 'persistent_data.json')):
+            self.migrate_from_json(storage_path)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use in each process."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self._db_file, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            local.conn = conn
+            local.pid = os.getpid()
+            local.data_version = None
+            local.batch_depth = 0
+        return local.conn
+    
+    def _check_external_writes(self, conn: sqlite3.Connection) -> None:
+        """Drop the hot cache if another connection has committed since the last check."""
+        version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._local.data_version:
+            self._local.data_version = version
+            with self._cache_lock:
+                self._cache.clear()
+                self._cache_epoch += 1
+    
+    def _cache_put(self, key: str, entry: Tuple[Any, Optional[float]]) -> None:
+        """Add a ``(value, expires_at)`` entry to the hot cache. Caller holds the cache lock."""
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retrieve a value from storage.
+        
+        Args:
+            key: The key to retrieve
+            default: Value to return if key doesn't exist
+        
+        Returns:
+            The stored value or the default
+        """
+        conn = self._connection()
+        self._check_external_writes(conn)
+        with self._cache_lock:
+            entry = self._cache.get(key, _NOT_CACHED)
+            if entry is not _NOT_CACHED:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return default if value is _ABSENT else value
+                del self._cache[key]
+            self.misses += 1
+            epoch = self._cache_epoch
+        
+        row = conn.execute('SELECT value, expires_at FROM kv WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            # Expired rows are left for the sweeper so reads never write
+            entry = (_ABSENT, None)
+        else:
+            entry = (json.loads(row[0]), row[1])
+        with self._cache_lock:
+            # Only cache what was read if nothing was written meanwhile
+            if self._cache_epoch == epoch:
+                self._cache_put(key, entry)
+        return default if entry[0] is _ABSENT else entry[0]
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, pinned: Optional[bool] = None) -> None:
+        """Store a value in storage.
+        
+        Args:
+            key: The key to store the value under
+            value: The value to store
+            ttl: Seconds until the key expires; None keeps it until deleted
+            pinned: Accepted for compatibility; values on disk are never evicted
+        """
+        data = json.dumps(value, separators=(',', ':'))
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._connection().execute(
+            'INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, data, expires_at)
+        )
+        if expires_at is not None:
+            self._ensure_sweeper()
+        self._written(key, (value, expires_at))
+    
+    def delete(self, key: str) -> None:
+        """Delete a value from storage.
+        
+        Args:
+            key: The key to delete
+        """
+        self._connection().execute('DELETE FROM kv WHERE key = ?', (key,))
+        self._written(key, (_ABSENT, None))
+    
+    def clear(self) -> None:
+        """Clear all stored values."""
+        self._connection().execute('DELETE FROM kv')
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_epoch += 1
+            self.writes += 1
+    
+    def _written(self, key: str, entry: Tuple[Any, Optional[float]]) -> None:
+        with self._cache_lock:
+            self._cache_epoch += 1
+            self._cache_put(key, entry)
+            self.writes += 1
+    
+    def scan(self, prefix: str = '') -> Iterator[Tuple[str, Any]]:
+        """Yield stored items whose key starts with ``prefix``, in key order.
+        
+        Seeks to the prefix in the primary key index and stops at the first
+        key past it, so the cost depends on the number of matches.
+        """
+        cursor = self._connection().execute(
+            'SELECT key, value FROM kv WHERE key >= ? AND (expires_at IS NULL OR expires_at > ?) ORDER BY key',
+            (prefix, time.time())
+        )
+        while True:
+            rows = cursor.fetchmany(SCAN_FETCH_SIZE)
+            if not rows:
+                return
+            for key, data in rows:
+                if not key.startswith(prefix):
+                    cursor.close()
+                    return
+                yield key, json.loads(data)
+    
+    @contextmanager
+    def batch(self) -> Iterator['SQLiteStorage']:
+        """Apply many changes from this thread in one transaction.
+        
+        The transaction commits when the outermost block ends, including on
+        an exception, so changes made before it are kept as with the JSON
+        backend.
+        """
+        conn = self._connection()
+        if self._local.batch_depth == 0:
+            conn.execute('BEGIN IMMEDIATE')
+        self._local.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._local.batch_depth -= 1
+            if self._local.batch_depth == 0:
+                conn.execute('COMMIT')
+    
+    def flush(self) -> None:
+        """Checkpoint the WAL, which syncs every committed change to disk."""
+        self._connection().execute('PRAGMA wal_checkpoint(PASSIVE)')
+    
+    sync = flush
+    
+    def stats(self) -> Dict[str, int]:
+        """Hot cache hits, misses and evictions, expirations, writes and cached values"""
+        with self._cache_lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'writes': self.writes,
+                'cached': len(self._cache)
+            }
+    
+    def _ensure_sweeper(self) -> None:
+        """Start the expiry sweeper thread once per process."""
+        pid = os.getpid()
+        if self._sweeper_pid == pid:
+            return
+        with self._sweeper_lock:
+            if self._sweeper_pid != pid:
+                threading.Thread(target=self._sweep_loop, name='storage-sweeper', daemon=True).start()
+                self._sweeper_pid = pid
+    
+    def _sweep_loop(self) -> None:
+        """Delete expired rows, found through the expiry index."""
+        while True:
+            time.sleep(self._sweep_interval)
+            try:
+                deleted = self._connection().execute(
+                    'DELETE FROM kv WHERE expires_at <= ?', (time.time(),)
+                ).rowcount
+            except sqlite3.OperationalError:
+                # Busy for longer than the timeout; try again next time
+                continue
+            with self._cache_lock:
+                self.expirations += deleted
+    
+    def migrate_from_json(self, storage_path: str) -> int:
+        """Copy the JSON store in ``storage_path`` into the database, once.
+        
+        Keys already in the database are kept, so a process that raced
+        ahead and wrote newer values does not lose them.
+        
+        Returns:
+            The number of keys copied, or 0 if the store was migrated before
+        
+        Raises:
+            StorageCorruptedError: If the JSON store cannot be parsed
+        """
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = None
+            if not conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_json'").fetchone():
+                source = PersistentStorage(storage_path, flush_interval=0)
+                # Expiry times carry over so cached entries do not become permanent
+                rows = [
+                    (key, json.dumps(value, separators=(',', ':')), source._expires.get(key))
+                    for key, value in source.scan()
+                ]
+                conn.executemany('INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, ?, ?)', rows)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)", (str(len(rows)),))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        
+        if rows is None:
+            return 0
+        with self._cache_lock:
+            self._cache.clear()
+            self._cache_epoch += 1
+        return len(rows)
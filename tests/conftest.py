@@ -0,0 +1,15 @@
+"""
+Test Configuration
+
+Puts the repository root on the import path, and runs the tests from a
+scratch directory because importing ``app`` creates the global log
+manager's ``logs`` directory in the working directory.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix='app-tests-'))
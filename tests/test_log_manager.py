@@ -0,0 +1,191 @@
+"""Tests for the log manager: rotation, pagination, formats and the writer thread."""
+
+import gzip
+import json
+import logging
+import multiprocessing
+
+import pytest
+
+from app.utils.log_manager import LogManager
+
+def make_manager(log_dir, **options):
+    # Every manager attaches to the shared 'app' logger; keep only this one
+    for handler in list(logging.getLogger('app').handlers):
+        logging.getLogger('app').removeHandler(handler)
+    return LogManager(str(log_dir), **options)
+
+@pytest.fixture
+def open_manager(tmp_path):
+    managers = []
+
+    def open_manager(**options):
+        manager = make_manager(tmp_path, **options)
+        managers.append(manager)
+        return manager
+
+    yield open_manager
+    for manager in managers:
+        manager.shutdown()
+        manager.logger.removeHandler(manager.queue_handler)
+
+def log_records(manager, count, level='info', prefix='record', batch_size=50):
+    """Log numbered records, waiting for the writer every ``batch_size`` so batches stay small"""
+    log = getattr(manager.logger, level)
+    for i in range(count):
+        log(f"{prefix} {i}")
+        if (i + 1) % batch_size == 0:
+            assert manager.flush(5)
+    assert manager.flush(5)
+
+def read_all_lines(log_dir):
+    manifest = json.loads((log_dir / 'manifest.json').read_text())
+    lines = []
+    for segment in manifest['segments']:
+        with gzip.open(log_dir / segment['file'], 'rt') as f:
+            lines += f.read().splitlines()
+    return manifest, lines + (log_dir / 'app.log').read_text().splitlines()
+
+def test_rotates_into_compressed_segments(tmp_path, open_manager):
+    manager = open_manager(max_bytes=2000)
+    log_records(manager, 500)
+
+    manifest, lines = read_all_lines(tmp_path)
+    assert len(manifest['segments']) >= 3
+    assert len(lines) == 500
+    assert sum(segment['records'] for segment in manifest['segments']) + manager.handler.index.summary()['records'] == 500
+
+def test_retention_keeps_newest_segments(tmp_path, open_manager):
+    manager = open_manager(max_bytes=4000, max_segments=2)
+    log_records(manager, 500)
+
+    manifest, lines = read_all_lines(tmp_path)
+    assert [segment['id'] for segment in manifest['segments']] == sorted(s['id'] for s in manifest['segments'])
+    assert len(manifest['segments']) == 2
+    assert lines[-1].endswith('record 499')
+
+def test_pages_cover_every_record_once_across_segments(open_manager):
+    manager = open_manager(max_bytes=4000)
+    log_records(manager, 500)
+
+    messages = []
+    cursor = None
+    while True:
+        page, cursor = manager.get_logs_page(limit=60, cursor=cursor)
+        messages += [entry.message for entry in page]
+        if cursor is None:
+            break
+    assert messages == [f"record {i}" for i in reversed(range(500))]
+
+def test_filters_by_level_and_search_terms(open_manager):
+    manager = open_manager(max_bytes=4000)
+    log_records(manager, 300)
+    manager.logger.error("payment gateway timeout")
+    log_records(manager, 300, prefix='later')
+
+    assert [entry.message for entry in manager.get_logs(level='ERROR')] == ['payment gateway timeout']
+    assert [entry.message for entry in manager.get_logs(query='Gateway TIMEOUT')] == ['payment gateway timeout']
+    assert manager.get_logs(query='nonexistentterm') == []
+
+def test_clear_logs_removes_segments(tmp_path, open_manager):
+    manager = open_manager(max_bytes=4000)
+    log_records(manager, 300)
+    assert manager.clear_logs()
+
+    manifest, lines = read_all_lines(tmp_path)
+    assert manifest['segments'] == [] and lines == []
+    assert manager.get_logs() == []
+
+def _log_from_worker(log_dir, worker):
+    manager = make_manager(log_dir, max_bytes=4000)
+    log_records(manager, 300, prefix=f"worker{worker}")
+    manager.shutdown()
+
+def test_workers_sharing_a_directory_lose_no_records(tmp_path, open_manager):
+    open_manager(max_bytes=4000)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_log_from_worker, args=(tmp_path, n)) for n in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    manifest, lines = read_all_lines(tmp_path)
+    assert len(lines) == len(set(lines)) == 900
+    for segment in manifest['segments']:
+        with gzip.open(tmp_path / segment['file'], 'rt') as f:
+            assert len(f.read().splitlines()) == segment['records']
+    # The parent indexes what the workers wrote
+    reader = open_manager(max_bytes=4000)
+    assert len(reader.get_logs(query='worker2', limit=1000)) == 300
+
+def test_json_lines_keep_tracebacks_in_exc(tmp_path, open_manager):
+    manager = open_manager(log_format='json')
+    try:
+        raise ValueError('bad value')
+    except ValueError:
+        manager.logger.exception("request failed")
+    assert manager.flush(5)
+
+    line = json.loads((tmp_path / 'app.log').read_text().splitlines()[-1])
+    assert line['msg'] == 'request failed'
+    assert 'ValueError: bad value' in line['exc']
+    assert manager.get_logs(level='ERROR')[0].message == 'request failed'
+
+def test_writer_keeps_running_when_metrics_fail(open_manager, monkeypatch):
+    manager = open_manager()
+
+    def fail(records):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(manager.metrics, 'add_records', fail)
+    log_records(manager, 1)
+    monkeypatch.undo()
+    log_records(manager, 2, prefix='after')
+
+    assert manager._writer.is_alive()
+    assert manager.writer_stats()['errors'] == 1
+    assert [entry.message for entry in manager.get_logs()][:2] == ['after 1', 'after 0']
+
+def test_metrics_save_failure_is_reported_not_raised(tmp_path, open_manager, capsys):
+    manager = open_manager()
+    log_records(manager, 2)
+    (tmp_path / 'metrics.tmp').mkdir()
+
+    assert manager.metrics.save() is False
+    assert manager.metrics.save_errors == 1
+    assert 'could not save log metrics' in capsys.readouterr().err
+
+def test_follow_waits_for_the_log_file_to_appear(tmp_path, open_manager):
+    manager = open_manager()
+    assert not (tmp_path / 'app.log').exists()
+
+    follower = manager.follow(poll_interval=0.01, heartbeat=0)
+    assert next(follower) is None
+    log_records(manager, 2)
+    entries = [entry for entry in (next(follower) for _ in range(10)) if entry is not None]
+    assert [entry.message for entry in entries[:2]] == ['record 0', 'record 1']
+    follower.close()
+
+def _count_from_worker(log_dir, worker):
+    manager = make_manager(log_dir)
+    log_records(manager, 10, prefix=f"worker{worker}")
+    manager.shutdown()
+
+def test_workers_sharing_a_directory_add_up_their_metrics(tmp_path, open_manager):
+    manager = open_manager()
+    log_records(manager, 5)
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_count_from_worker, args=(tmp_path, n)) for n in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    # The parent sees the workers' saved counts along with its own unsaved ones
+    assert manager.metrics.total('day', since=0) == {'INFO': 35}
+    assert manager.metrics.save()
+    saved = json.loads((tmp_path / 'metrics.json').read_text())
+    assert sum(bucket['levels']['INFO'] for bucket in saved['day'].values()) == 35
@@ -0,0 +1,160 @@
+"""Tests for the JSON storage backend: journal, reopen, sharing, TTLs and eviction."""
+
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from storage.persistent import PersistentStorage, StorageCorruptedError
+
+def open_store(path, **options):
+    options.setdefault('flush_interval', 0)
+    return PersistentStorage(str(path), **options)
+
+def read_snapshot(path):
+    with open(os.path.join(path, 'persistent_data.json')) as f:
+        return json.load(f)
+
+def test_journal_survives_reopen(tmp_path):
+    store = open_store(tmp_path)
+    for i in range(10):
+        store.set(f'k{i}', {'i': i})
+    store.delete('k3')
+
+    reopened = open_store(tmp_path)
+    assert reopened.get('k9') == {'i': 9}
+    assert reopened.get('k3') is None
+    assert len(list(reopened.scan())) == 9
+
+def test_reopen_without_journal_keeps_journaled_keys(tmp_path):
+    store = open_store(tmp_path)
+    for i in range(5):
+        store.set(f'k{i}', i)
+
+    snapshot_mode = open_store(tmp_path, journal=False)
+    assert dict(snapshot_mode.scan()) == {f'k{i}': i for i in range(5)}
+    # The journal is folded into the snapshot and removed
+    assert not os.path.exists(tmp_path / 'persistent_data.journal')
+
+    snapshot_mode.set('new', 1)
+    assert read_snapshot(tmp_path) == {**{f'k{i}': i for i in range(5)}, 'new': 1}
+    assert len(list(open_store(tmp_path).scan())) == 6
+
+def test_compaction_then_reopen(tmp_path):
+    store = open_store(tmp_path, compact_threshold=2000)
+    expected = {}
+    for i in range(500):
+        store.set(f'k{i % 50}', i)
+        expected[f'k{i % 50}'] = i
+    if store._compactor is not None:
+        store._compactor.join()
+
+    assert os.path.getsize(tmp_path / 'persistent_data.journal') < 2000
+    assert dict(open_store(tmp_path).scan()) == expected
+
+def test_interrupted_compaction_is_replayed(tmp_path):
+    store = open_store(tmp_path)
+    store.set('a', 1)
+    store.set('b', 2)
+    # As if the process died after moving the journal aside
+    store._journal.close()
+    os.replace(tmp_path / 'persistent_data.journal', tmp_path / 'persistent_data.journal.compacting')
+
+    reopened = open_store(tmp_path)
+    assert dict(reopened.scan()) == {'a': 1, 'b': 2}
+    assert not os.path.exists(tmp_path / 'persistent_data.journal.compacting')
+
+def test_torn_journal_record_is_skipped(tmp_path):
+    store = open_store(tmp_path)
+    store.set('a', 1)
+    with open(tmp_path / 'persistent_data.journal', 'ab') as f:
+        f.write(b'{"op":"set","k":"torn"')
+
+    reopened = open_store(tmp_path)
+    assert reopened.get('torn') is None
+    reopened.set('b', 2)
+    assert dict(open_store(tmp_path).scan()) == {'a': 1, 'b': 2}
+
+def test_corrupt_snapshot_raises(tmp_path):
+    open_store(tmp_path).set('a', 1)
+    with open(tmp_path / 'persistent_data.json', 'w') as f:
+        f.write('{"a": ')
+
+    with pytest.raises(StorageCorruptedError):
+        open_store(tmp_path)
+
+def test_instances_see_each_others_writes_and_compaction(tmp_path):
+    writer = open_store(tmp_path)
+    reader = open_store(tmp_path)
+    writer.set('a', 1)
+    assert reader.get('a') == 1
+
+    writer._compact()
+    writer.set('b', 2)
+    assert reader.get('b') == 2
+    assert reader.get('a') == 1
+    reader.set('c', 3)
+    assert dict(open_store(tmp_path).scan()) == {'a': 1, 'b': 2, 'c': 3}
+
+def test_batch_coalesces_into_one_write(tmp_path):
+    store = open_store(tmp_path)
+    with store.batch():
+        for i in range(100):
+            store.set('counter', i)
+
+    stats = store.stats()
+    assert stats['writes'] == 1
+    assert stats['coalesced_writes'] == 99
+    assert open_store(tmp_path).get('counter') == 99
+
+def test_flush_interval_defers_writes_until_flush(tmp_path):
+    store = open_store(tmp_path, flush_interval=60)
+    store.set('a', 1)
+    assert open_store(tmp_path).get('a') is None
+
+    store.flush()
+    assert open_store(tmp_path).get('a') == 1
+
+def _write_keys(path, worker):
+    store = open_store(path)
+    for i in range(50):
+        store.set(f'w{worker}:{i}', i)
+
+def test_processes_share_one_store(tmp_path):
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_write_keys, args=(str(tmp_path), n)) for n in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(list(open_store(tmp_path).scan())) == 150
+
+def test_ttl_expires_keys_and_survives_reopen(tmp_path):
+    store = open_store(tmp_path)
+    store.set('short', 1, ttl=0.2)
+    store.set('long', 2, ttl=60)
+    assert open_store(tmp_path).get('short') == 1
+
+    time.sleep(0.3)
+    assert store.get('short') is None
+    reopened = open_store(tmp_path)
+    assert reopened.get('short') is None
+    assert reopened.get('long') == 2
+    assert reopened._expires['long'] > time.time()
+
+def test_memory_cap_evicts_least_recently_used_unpinned_keys(tmp_path):
+    store = open_store(tmp_path, max_memory=400)
+    store.set('pinned', 'p' * 100)
+    store.set('old', 'o' * 100, ttl=60)
+    store.set('recent', 'r' * 100, ttl=60)
+    store.get('old')
+    store.set('newest', 'n' * 100, ttl=60)
+
+    assert store.get('pinned') is not None
+    assert store.get('old') is not None
+    assert store.get('recent') is None
+    assert store.stats()['evictions'] == 1
+    assert open_store(tmp_path).get('recent') is None
@@ -0,0 +1,75 @@
+"""Tests for the token-bucket rate limiter: admission, rejection and pacing."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.rate_limiter import RateLimitExceeded, TokenBucketLimiter
+
+def drained_limiter(requests_per_minute=600, tokens_per_minute=10 ** 9, max_queue_size=20, max_queue_delay=10):
+    limiter = TokenBucketLimiter(requests_per_minute, tokens_per_minute, max_queue_size, max_queue_delay)
+    limiter._requests = 0
+    return limiter
+
+def test_admits_a_burst_up_to_capacity_without_waiting():
+    limiter = TokenBucketLimiter(60, 10 ** 6, 5, 1)
+    assert [limiter.acquire(10) for _ in range(60)] == [0] * 60
+
+def test_concurrent_callers_queue_for_refill():
+    limiter = drained_limiter()  # 10 requests per second
+    waits = []
+    callers = [threading.Thread(target=lambda: waits.append(limiter.acquire())) for _ in range(3)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    assert sorted(waits) == pytest.approx([0.1, 0.2, 0.3], abs=0.05)
+
+def test_rejects_waits_longer_than_max_delay():
+    limiter = drained_limiter(max_queue_delay=0.05)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire()
+    assert limiter.stats()['rejected'] == 1
+
+def test_rejects_when_wait_queue_is_full():
+    limiter = drained_limiter(requests_per_minute=60, max_queue_size=2)
+    waiting = [threading.Thread(target=limiter.acquire) for _ in range(2)]
+    for thread in waiting:
+        thread.start()
+    time.sleep(0.05)
+    with pytest.raises(RateLimitExceeded, match='queue is full'):
+        limiter.acquire()
+    for thread in waiting:
+        thread.join()
+
+def test_token_limit_applies_as_well_as_request_limit():
+    limiter = TokenBucketLimiter(10 ** 6, 600, 5, 0.5)
+    limiter.acquire(600)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire(100)  # 10 seconds of tokens
+
+def test_paced_callers_wait_instead_of_being_rejected():
+    limiter = drained_limiter(max_queue_size=1, max_queue_delay=0.01)
+
+    async def run():
+        return await asyncio.gather(*(limiter.acquire_paced_async(10) for _ in range(10)))
+
+    start = time.monotonic()
+    waits = asyncio.run(run())
+    assert len(waits) == 10
+    assert time.monotonic() - start == pytest.approx(1.0, abs=0.3)
+    assert limiter.stats()['rejected'] == 0
+
+def test_paced_callers_let_queued_callers_go_first():
+    limiter = drained_limiter()  # 10 requests per second
+    order = []
+    interactive = threading.Thread(target=lambda: (limiter.acquire(), order.append('interactive')))
+    interactive.start()
+    time.sleep(0.01)  # The interactive caller has reserved the next slot
+
+    limiter.acquire_paced()
+    order.append('paced')
+    interactive.join()
+    assert order == ['interactive', 'paced']
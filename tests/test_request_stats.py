@@ -0,0 +1,17 @@
+"""Tests for per-route request statistics."""
+
+import time
+
+from app.utils.request_stats import RequestStats
+
+def test_window_closes_on_time_without_further_requests(monkeypatch):
+    written = []
+    monkeypatch.setattr(RequestStats, '_write_summary', staticmethod(lambda start, end, routes: written.append(routes)))
+    stats = RequestStats(interval=0.2)
+    stats.record('GET /', 200, 12)
+    stats.record('GET /', 503, 40)
+
+    time.sleep(0.5)
+    routes = [window for window in written if window]
+    assert len(routes) == 1
+    assert routes[0]['GET /'].summary() == {'n': 2, '4xx': 0, '5xx': 1, 'avg_ms': 26.0, 'p95_ms': 50, 'max_ms': 40}
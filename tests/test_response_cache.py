@@ -0,0 +1,47 @@
+"""Tests for the AI response cache: keys, LRU eviction, TTL and persistence."""
+
+import time
+
+from app.services.response_cache import ResponseCache
+
+def payload(content, **params):
+    return {'model': 'gpt-test', 'messages': [{'role': 'user', 'content': content}], **params}
+
+def test_key_ignores_whitespace_and_streaming_but_not_parameters():
+    key = ResponseCache.make_key(payload('hello   world'))
+    assert ResponseCache.make_key(payload(' hello world\n', stream=True)) == key
+    assert ResponseCache.make_key(payload('hello world', temperature=0.2)) != key
+
+def test_evicts_least_recently_used_when_full():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(ttl=0.2)
+    cache.set('a', 1)
+    assert cache.peek('a') == 1
+
+    time.sleep(0.3)
+    assert cache.peek('a') is None
+    assert cache.get('a') is None
+    assert cache.stats() == {'hits': 0, 'misses': 1, 'hit_ratio': 0, 'entries': 0}
+
+def test_save_and_load_keep_unexpired_entries_in_lru_order(tmp_path):
+    path = str(tmp_path / 'cache.json')
+    cache = ResponseCache(max_entries=3, persist_path=path)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key.upper())
+    cache.get('a')
+    cache.save()
+
+    reloaded = ResponseCache(max_entries=3, persist_path=path)
+    reloaded.set('d', 'D')
+    assert reloaded.get('b') is None
+    assert [reloaded.get(key) for key in ('a', 'c', 'd')] == ['A', 'C', 'D']
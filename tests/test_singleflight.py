@@ -0,0 +1,108 @@
+"""Tests for single-flight coalescing of calls and streams."""
+
+import threading
+import time
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+def run_concurrently(count, fn):
+    results = [None] * count
+
+    def call(i):
+        results[i] = fn()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'done'
+
+    results = run_concurrently(5, lambda: flight.do('key', work))
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.stats() == {'executed': 1, 'coalesced': 4, 'in_flight': 0}
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+    errors = []
+
+    def work():
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    def call():
+        try:
+            flight.do('key', work)
+        except ValueError as e:
+            errors.append(str(e))
+
+    run_concurrently(3, call)
+    assert errors == ['boom'] * 3
+
+def slow_items(count, calls):
+    calls.append(1)
+    for i in range(count):
+        time.sleep(0.05)
+        yield i
+
+def test_late_stream_callers_receive_every_item():
+    flight = SingleFlight()
+    calls = []
+    results = run_concurrently(4, lambda: list(flight.stream('key', lambda: slow_items(5, calls))))
+
+    assert len(calls) == 1
+    for items in results:
+        assert [item for item, _ in items] == [0, 1, 2, 3, 4]
+    assert flight.stats()['in_flight'] == 0
+
+def test_stream_finishes_for_followers_when_first_caller_stops():
+    flight = SingleFlight()
+    calls = []
+    leader = flight.stream('key', lambda: slow_items(5, calls))
+    assert next(leader) == (0, False)
+
+    follower = []
+    thread = threading.Thread(target=lambda: follower.extend(flight.stream('key', lambda: slow_items(5, calls))))
+    thread.start()
+    time.sleep(0.01)
+    leader.close()
+    thread.join()
+
+    assert len(calls) == 1
+    assert follower == [(i, True) for i in range(5)]
+
+def test_stream_errors_reach_followers():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        yield 'first'
+        raise ValueError('stream broke')
+
+    def consume():
+        try:
+            return [item for item, _ in flight.stream('key', failing)]
+        except ValueError as e:
+            return str(e)
+
+    assert run_concurrently(2, consume) == ['stream broke', 'stream broke']
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    with pytest.raises(KeyError):
+        flight.do('c', lambda: {}['missing'])
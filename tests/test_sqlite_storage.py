@@ -0,0 +1,57 @@
+"""Tests for the SQLite storage backend."""
+
+import time
+
+from storage.persistent import PersistentStorage, StorageBackend
+from storage.sqlite_storage import SQLiteStorage
+
+def test_is_a_storage_backend(tmp_path):
+    assert isinstance(SQLiteStorage(str(tmp_path)), StorageBackend)
+
+def test_set_get_delete_and_reopen(tmp_path):
+    store = SQLiteStorage(str(tmp_path))
+    store.set('a', {'x': 1})
+    store.set('b', [1, 2])
+    store.delete('b')
+
+    reopened = SQLiteStorage(str(tmp_path))
+    assert reopened.get('a') == {'x': 1}
+    assert reopened.get('b', 'missing') == 'missing'
+
+def test_scan_returns_prefix_matches_in_key_order(tmp_path):
+    store = SQLiteStorage(str(tmp_path))
+    with store.batch():
+        for key in ('user:2:b', 'user:1:a', 'user:10:c', 'other:1'):
+            store.set(key, key)
+
+    assert [key for key, _ in store.scan('user:1')] == ['user:10:c', 'user:1:a']
+
+def test_migrates_json_store_once(tmp_path):
+    json_store = PersistentStorage(str(tmp_path), flush_interval=0)
+    json_store.set('a', 1)
+    json_store.set('temp', 2, ttl=60)
+
+    store = SQLiteStorage(str(tmp_path))
+    assert store.get('a') == 1
+    assert store.get('temp') == 2
+    store.set('a', 5)
+    # A second open does not copy the JSON values over newer ones
+    assert SQLiteStorage(str(tmp_path)).get('a') == 5
+
+def test_expired_rows_read_as_missing(tmp_path):
+    store = SQLiteStorage(str(tmp_path))
+    store.set('short', 1, ttl=0.2)
+    store.set('long', 2)
+    time.sleep(0.3)
+
+    assert store.get('short') is None
+    assert dict(store.scan()) == {'long': 2}
+
+def test_hot_cache_sees_writes_from_other_connections(tmp_path):
+    first = SQLiteStorage(str(tmp_path))
+    second = SQLiteStorage(str(tmp_path))
+    first.set('a', 1)
+    assert second.get('a') == 1
+
+    first.set('a', 2)
+    assert second.get('a') == 2